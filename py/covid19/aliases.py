@@ -0,0 +1,39 @@
+"""
+Canonical names of locations JHU renamed over time.
+Names map to the ones of the latest reports.
+"""
+from covid19 import typedef
+
+COUNTRY_ALIASES = {
+    "Mainland China": "China",
+    "South Korea": "Korea, South",
+    "Republic of Korea": "Korea, South",
+    "Iran (Islamic Republic of)": "Iran",
+    "Taiwan": "Taiwan*",
+    "Taipei and environs": "Taiwan*",
+    "Hong Kong SAR": "Hong Kong",
+    "Macao SAR": "Macau",
+    "Viet Nam": "Vietnam",
+    "Russian Federation": "Russia",
+    "Republic of Moldova": "Moldova",
+    "UK": "United Kingdom",
+    "North Ireland": "United Kingdom",
+    "Republic of Ireland": "Ireland",
+    "Czech Republic": "Czechia",
+    "occupied Palestinian territory": "West Bank and Gaza",
+    "Palestine": "West Bank and Gaza",
+    "The Bahamas": "Bahamas",
+    "Bahamas, The": "Bahamas",
+    "The Gambia": "Gambia",
+    "Gambia, The": "Gambia",
+    "Ivory Coast": "Cote d'Ivoire",
+    "Vatican City": "Holy See",
+    "Cape Verde": "Cabo Verde",
+    "East Timor": "Timor-Leste",
+    "Republic of the Congo": "Congo (Brazzaville)",
+}
+
+# Aliases of each level of the location hierarchy
+LOCATION_ALIASES = {
+    typedef.Columns.REGION: COUNTRY_ALIASES,
+}
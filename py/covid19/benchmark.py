@@ -0,0 +1,216 @@
+"""
+Benchmarks of the pipeline over synthetic JHU daily reports,
+at multiples of the size of the JHU archive.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import os.path
+import statistics
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from covid19 import instrument
+from covid19.data import generate
+from covid19.data import preproc
+from covid19.viz import createviz
+
+
+@dataclasses.dataclass(frozen=True)
+class Args:
+    work_path: str
+    scales: Sequence[int]
+    days: Optional[int]
+    repeat: int
+    workers: int
+    report_path: Optional[str]
+
+
+def prepare_reports(work_path: str, scale: generate.SyntheticScale) -> str:
+    """
+    Generates the daily reports for `scale` once, and reuses them on later runs.
+    """
+    reports_path = os.path.join(
+        work_path,
+        f"reports-{scale.days}d-{scale.countries}x{scale.provinces}x{scale.counties}",
+    )
+    marker_path = os.path.join(reports_path, ".complete")
+    if not os.path.exists(marker_path):
+        generate.generate_jhu_daily_reports(reports_path, scale)
+        open(marker_path, "w").close()
+    return reports_path
+
+
+def run_scale(
+    work_path: str,
+    scale: generate.SyntheticScale,
+    repeat: int,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    reports_path = prepare_reports(work_path, scale)
+    output_path = os.path.join(work_path, "processed")
+    charts_path = os.path.join(output_path, "charts")
+    if not os.path.exists(charts_path):
+        os.makedirs(charts_path)
+    files = sorted(preproc.get_jhu_files(reports_path), key=preproc.get_jhu_log_date)
+
+    ingest_benchmarks: Sequence[Tuple[str, Callable[[], Any]]] = (
+        # the latest layout has the most columns and rows
+        ("read_jhu_log", lambda: preproc.read_jhu_log(files[-1])),
+        ("join_jhu_logs", lambda: preproc.join_jhu_logs(reports_path, workers=workers)),
+        (
+            "process_data_from_jhu",
+            lambda: preproc.process_data_from_jhu(
+                reports_path, output_path, workers=workers
+            ),
+        ),
+        (
+            "read_proc_data",
+            lambda: preproc.read_proc_data(output_path, use_cache=False),
+        ),
+    )
+    results = [
+        time_benchmark(name, benchmark_fn, scale, repeat)
+        for name, benchmark_fn in ingest_benchmarks
+    ]
+    # read once untimed, after the datasets were last written,
+    # so every timed run is a cache hit
+    preproc.read_proc_data(output_path)
+    results.append(
+        time_benchmark(
+            "read_proc_data_cached",
+            lambda: preproc.read_proc_data(output_path),
+            scale,
+            repeat,
+        )
+    )
+
+    # Charts are timed on their own, over data read beforehand.
+    dfs = preproc.read_proc_data(output_path, use_cache=False)
+    viz_benchmarks: Sequence[Tuple[str, Callable[[], Any]]] = (
+        (
+            "create_viz_growth_simulation",
+            lambda: createviz.create_viz_growth_simulation(charts_path),
+        ),
+        (
+            "create_viz_world_confirmed_and_rate",
+            lambda: createviz.create_viz_world_confirmed_and_rate(charts_path, dfs),
+        ),
+        (
+            "create_viz_region_confirmed_and_rate",
+            lambda: createviz.create_viz_region_confirmed_and_rate(charts_path, dfs),
+        ),
+    )
+    results.extend(
+        time_benchmark(name, benchmark_fn, scale, repeat)
+        for name, benchmark_fn in viz_benchmarks
+    )
+    return results
+
+
+def time_benchmark(
+    name: str,
+    benchmark_fn: Callable[[], Any],
+    scale: generate.SyntheticScale,
+    repeat: int,
+) -> Dict[str, Any]:
+    recorder = instrument.Recorder()
+    for _ in range(repeat):
+        with recorder.stage(name) as record:
+            record.rows = instrument.count_rows(benchmark_fn())
+    wall_times = [record.wall_time for record in recorder.records]
+    return {
+        "benchmark": name,
+        "scale": dataclasses.asdict(scale),
+        "repeat": repeat,
+        "min_wall_time": min(wall_times),
+        "median_wall_time": statistics.median(wall_times),
+        "median_cpu_time": statistics.median(
+            record.cpu_time for record in recorder.records
+        ),
+        "peak_rss_mb": max(record.peak_rss_mb for record in recorder.records),
+        "rows": recorder.records[-1].rows,
+    }
+
+
+def run(
+    work_path: str,
+    scales: Sequence[int] = (1, 10, 100),
+    days: Optional[int] = None,
+    repeat: int = 3,
+    workers: int = 1,
+) -> List[Dict[str, Any]]:
+    results = []
+    for factor in scales:
+        scale = generate.JHU_SCALE.scaled(factor)
+        if days is not None:
+            scale = dataclasses.replace(scale, days=days)
+        results.extend(run_scale(work_path, scale, repeat=repeat, workers=workers))
+    return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"{'benchmark':<40} {'locations x days':>18} {'min (s)':>9} {'median (s)':>11} {'rows':>10}"
+    ]
+    for result in results:
+        scale = result["scale"]
+        locations = scale["countries"] * scale["provinces"] * scale["counties"]
+        size = f"{locations} x {scale['days']}"
+        lines.append(
+            f"{result['benchmark']:<40} {size:>18}"
+            f" {result['min_wall_time']:>9.3f} {result['median_wall_time']:>11.3f}"
+            f" {str(result['rows']):>10}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args() -> Args:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--work-path",
+        required=True,
+        help="Dir for the synthetic reports and outputs. Reports are reused across runs",
+    )
+    arg_parser.add_argument(
+        "--scales",
+        nargs="+",
+        type=int,
+        default=[1, 10, 100],
+        help="Multiples of the size of the JHU archive to run at",
+    )
+    arg_parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="Number of daily reports, to override the archive's, e.g. for quick runs",
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of runs of each benchmark"
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse daily reports",
+    )
+    arg_parser.add_argument(
+        "--report-path", default=None, help="Path to save the results as json"
+    )
+    kwargs, _ = arg_parser.parse_known_args()
+    return Args(**vars(kwargs))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(
+        args.work_path,
+        scales=args.scales,
+        days=args.days,
+        repeat=args.repeat,
+        workers=args.workers,
+    )
+    print(format_results(results))
+    if args.report_path:
+        with open(args.report_path, "w") as file:
+            json.dump(results, file, indent=2)
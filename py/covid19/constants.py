@@ -5,3 +5,8 @@ FILE_REGION_AGG_JHU_CONFIRMED = "jhu-region-agg-confirmed.csv"
 FILE_REGION_AGG_JHU_GROWTH_RATE = "jhu-agg-confirmed-growth-rate.csv"
 FILE_WORLD_AGG_JHU_CONFIRMED = "jhu-world-agg-confirmed.csv"
 FILE_WORLD_AGG_JHU_GROWTH_RATE = "jhu-world-agg-confirmed-growth-rate.csv"
+FILE_PROVINCE_AGG_JHU_CONFIRMED = "jhu-province-agg-confirmed.csv"
+FILE_COUNTY_AGG_JHU_CONFIRMED = "jhu-county-agg-confirmed.csv"
+FILE_REGION_PROJECTION_JHU = "jhu-region-projection.csv"
+FILE_REGION_METRICS_JHU = "jhu-region-metrics.csv"
+FILE_WORLD_METRICS_JHU = "jhu-world-metrics.csv"
@@ -0,0 +1,122 @@
+"""
+Process local cache of datasets read from disk.
+Entries are checked against the size and mtime of their files,
+evicted least recently used first, and bounded by their memory usage.
+"""
+import collections
+import os
+import threading
+from typing import Callable, Dict, Hashable, Optional, OrderedDict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 1 GiB
+DEFAULT_MAX_BYTES = 1 << 30
+
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+
+def fingerprint(file_paths: Sequence[str]) -> Fingerprint:
+    fingerprints = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        fingerprints.append((os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprints)
+
+
+class DatasetCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (fingerprint, datasets, size in bytes), least recently used first
+        self._entries: OrderedDict[
+            Hashable, Tuple[Fingerprint, Dict[str, pd.DataFrame], int]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_read(
+        self,
+        key: Hashable,
+        file_paths: Sequence[str],
+        read_fn: Callable[[], Dict[str, pd.DataFrame]],
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Datasets cached under `key`, if none of `file_paths` changed since they were
+        read, or else the ones `read_fn` reads now. Frames are read-only,
+        and shared with other callers: copy them before making changes.
+        """
+        current = fingerprint(file_paths)
+        datasets = self._get(key, current)
+        if datasets is None:
+            datasets = read_fn()
+            for df in datasets.values():
+                _make_read_only(df)
+            self._put(key, current, datasets)
+        # new containers, so callers can't add or drop columns of cached frames
+        return {name: df.copy(deep=False) for name, df in datasets.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _get(
+        self, key: Hashable, current: Fingerprint
+    ) -> Optional[Dict[str, pd.DataFrame]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != current:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put(
+        self, key: Hashable, current: Fingerprint, datasets: Dict[str, pd.DataFrame]
+    ) -> None:
+        size_bytes = sum(
+            int(df.memory_usage(index=True, deep=True).sum())
+            for df in datasets.values()
+        )
+        with self._lock:
+            self._remove(key)
+            if size_bytes > self.max_bytes:
+                return
+            while self.size_bytes + size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (current, datasets, size_bytes)
+            self.size_bytes += size_bytes
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+
+# Process wide cache, used by `preproc.read_proc_data`.
+DATASET_CACHE = DatasetCache()
+
+
+def _make_read_only(df: pd.DataFrame) -> None:
+    """
+    Flags the arrays backing `df` as read-only, so writes to its values raise.
+    """
+    for array in df._mgr.arrays:
+        for values in _backing_arrays(array):
+            values.flags.writeable = False
+
+
+def _backing_arrays(array) -> Sequence[np.ndarray]:
+    if isinstance(array, np.ndarray):
+        return [array]
+    # categoricals and datetimes
+    if hasattr(array, "_ndarray"):
+        return [array._ndarray]
+    # nullable arrays, e.g. Int64
+    if hasattr(array, "_data") and hasattr(array, "_mask"):
+        return [array._data, array._mask]
+    return []
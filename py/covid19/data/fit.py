@@ -0,0 +1,208 @@
+"""
+Growth models fitted to the trailing window of every location at once.
+Fits are closed form weighted least squares over the dense arrays
+of a `TimeSeriesStore`, batched over locations (and windows),
+instead of one solve per location.
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from covid19 import instrument
+from covid19 import typedef
+from covid19.data import timeseries
+
+MODELS = ("log-linear", "logistic")
+DEFAULT_MODELS = ("log-linear",)
+DEFAULT_WINDOW = 14
+DEFAULT_HORIZON = 14
+
+# Candidate carrying capacities of the logistic model,
+# as multiples of the largest count in the window.
+LOGISTIC_CAPACITY_GRID = np.geomspace(1.05, 100.0, 64)
+
+
+def fit_log_linear(
+    store: timeseries.TimeSeriesStore,
+    window: int = DEFAULT_WINDOW,
+    column: str = typedef.Columns.CONFIRMED,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fits log(count) = intercept + slope * day over the trailing `window` days
+    ending on each date, for every location and date at once.
+    Days are positions in `store.dates`. Returns locations x dates arrays,
+    NaN where the window has fewer than two reports with a positive count.
+    """
+    counts = store.values[column]
+    weights = (store.observed & (counts > 0)).astype(float)
+    days = np.broadcast_to(np.arange(store.shape[1], dtype=float), store.shape)
+    with np.errstate(divide="ignore"):
+        log_counts = np.where(weights > 0, np.log(counts), 0.0)
+
+    sums = [
+        _rolling_sum(array, window)
+        for array in (
+            weights,
+            weights * days,
+            weights * days * days,
+            weights * log_counts,
+            weights * days * log_counts,
+        )
+    ]
+    return _solve_normal_equations(*sums)
+
+
+def fit_logistic(
+    store: timeseries.TimeSeriesStore,
+    window: int = DEFAULT_WINDOW,
+    column: str = typedef.Columns.CONFIRMED,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fits count = capacity / (1 + exp(intercept + slope * day)) over
+    the last `window` days, for every location at once.
+    The model is linear in log(capacity / count - 1) for a fixed capacity,
+    so it is fitted for each capacity of `LOGISTIC_CAPACITY_GRID`, and
+    the capacity with the least squared error of log(count) is kept.
+    Returns arrays of capacities, intercepts and slopes, one per location.
+    """
+    counts = store.values[column][:, -window:].astype(float)
+    weights = (store.observed[:, -window:] & (counts > 0)).astype(float)
+    days = np.arange(store.shape[1] - counts.shape[1], store.shape[1], dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_counts = np.where(weights > 0, np.log(counts), 0.0)
+
+    # (capacities, locations, days)
+    capacities = (
+        LOGISTIC_CAPACITY_GRID[:, np.newaxis] * np.max(counts * weights, axis=1)
+    )[:, :, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logits = np.where(weights > 0, np.log(capacities / counts - 1.0), 0.0)
+    intercepts, slopes = _solve_normal_equations(
+        weights.sum(axis=1),
+        (weights * days).sum(axis=1),
+        (weights * days * days).sum(axis=1),
+        (weights * logits).sum(axis=2),
+        (weights * days * logits).sum(axis=2),
+    )
+
+    with np.errstate(divide="ignore", over="ignore"):
+        fitted = np.log(capacities) - np.log1p(
+            np.exp(intercepts[:, :, np.newaxis] + slopes[:, :, np.newaxis] * days)
+        )
+    errors = np.sum(weights * (fitted - log_counts) ** 2, axis=2)
+    errors[np.isnan(errors)] = np.inf
+    best = np.argmin(errors, axis=0)
+    locations = np.arange(store.shape[0])
+    return (
+        capacities[best, locations, 0],
+        intercepts[best, locations],
+        slopes[best, locations],
+    )
+
+
+def project(
+    store: timeseries.TimeSeriesStore,
+    window: int = DEFAULT_WINDOW,
+    horizon: int = DEFAULT_HORIZON,
+    models: Sequence[str] = DEFAULT_MODELS,
+    column: str = typedef.Columns.CONFIRMED,
+) -> pd.DataFrame:
+    """
+    Long-form frame of each model fitted to the last `window` days of every location,
+    projected `horizon` days ahead. Each row holds the observed count (missing
+    for days without a report and for days ahead), the projected count, and
+    the projected growth rate. Locations that can't be fitted are left out.
+    """
+    unknown = set(models) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown models {sorted(unknown)}")
+
+    num_dates = store.shape[1]
+    window = min(window, num_dates)
+    # one day before the window, to have a growth rate for its first day
+    days = np.arange(num_dates - window - 1, num_dates + horizon, dtype=float)
+
+    frames = []
+    for model in models:
+        if model == "log-linear":
+            intercepts, slopes = fit_log_linear(store, window, column)
+            intercepts, slopes = intercepts[:, -1], slopes[:, -1]
+            log_projected = intercepts[:, np.newaxis] + slopes[:, np.newaxis] * days
+        else:
+            capacities, intercepts, slopes = fit_logistic(store, window, column)
+            with np.errstate(divide="ignore", over="ignore"):
+                log_projected = np.log(capacities)[:, np.newaxis] - np.log1p(
+                    np.exp(intercepts[:, np.newaxis] + slopes[:, np.newaxis] * days)
+                )
+        fitted = np.flatnonzero(np.isfinite(slopes))
+        log_projected = log_projected[fitted]
+        growth_rate = np.exp(np.diff(log_projected, axis=1))
+
+        observed = np.zeros((len(fitted), window + horizon), dtype=bool)
+        observed[:, :window] = store.observed[fitted, -window:]
+        counts = np.zeros(observed.shape, dtype=np.int64)
+        counts[:, :window] = store.values[column][fitted, -window:]
+
+        dates = store.dates[0] + pd.to_timedelta(days[1:], unit="D")
+        df = pd.DataFrame(
+            {
+                typedef.Columns.REGION: pd.Categorical.from_codes(
+                    np.repeat(fitted, len(dates)), categories=store.locations
+                ),
+                typedef.Columns.DATE: np.tile(dates, len(fitted)),
+                typedef.Columns.MODEL: model,
+                column: pd.arrays.IntegerArray(counts.ravel(), ~observed.ravel()),
+                typedef.Columns.PROJECTED: np.exp(log_projected[:, 1:]).round(1).ravel(),
+                typedef.Columns.GROWTH_RATE: growth_rate.round(3).ravel(),
+            }
+        )
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df[typedef.Columns.MODEL] = df[typedef.Columns.MODEL].astype("category")
+    return df
+
+
+@instrument.instrumented()
+def generate_regional_projections(
+    df_region_agg_confirmed: pd.DataFrame,
+    window: int = DEFAULT_WINDOW,
+    horizon: int = DEFAULT_HORIZON,
+    models: Sequence[str] = DEFAULT_MODELS,
+) -> pd.DataFrame:
+    store = timeseries.TimeSeriesStore.from_frame(
+        df_region_agg_confirmed, columns=[typedef.Columns.CONFIRMED]
+    )
+    return project(store, window=window, horizon=horizon, models=models)
+
+
+def _rolling_sum(array: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sums of the trailing `window` entries along the last axis,
+    including partial windows at the start.
+    """
+    sums = np.cumsum(array, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    return sums
+
+
+def _solve_normal_equations(
+    sum_w: np.ndarray,
+    sum_x: np.ndarray,
+    sum_xx: np.ndarray,
+    sum_y: np.ndarray,
+    sum_xy: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solves the 2x2 normal equations of weighted least squares y = a + b * x
+    in closed form, element wise over any batch shape.
+    Returns NaN where the system is singular, e.g. with fewer than two points.
+    """
+    determinant = sum_w * sum_xx - sum_x * sum_x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (sum_w * sum_xy - sum_x * sum_y) / determinant
+        intercept = (sum_y - slope * sum_x) / sum_w
+    singular = ~(np.abs(determinant) > 1e-9)
+    slope = np.where(singular, np.nan, slope)
+    intercept = np.where(singular, np.nan, intercept)
+    return intercept, slope
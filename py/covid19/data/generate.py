@@ -1,6 +1,9 @@
+import dataclasses
 import datetime
-import math
+import os.path
+from typing import List, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
 from covid19 import typedef
@@ -12,17 +15,239 @@ def generate_infection_projection_data(
     starting_cases: int,
     growth_rate: float,
 ):
-    entries = []
-    days = (end_date - start_date + datetime.timedelta(days=1)).days
-
-    for day in range(days):
-        cases = int(starting_cases * math.pow(growth_rate, day))
-        entries.append([day, cases, growth_rate])
-    return pd.DataFrame(
-        entries,
-        columns=[
+    df = generate_infection_projections(
+        start_date, end_date, starting_cases=[starting_cases], growth_rates=[growth_rate]
+    )
+    return df[
+        [
             typedef.Columns.DATE,
             typedef.Columns.CONFIRMED,
             typedef.Columns.GROWTH_RATE,
+        ]
+    ]
+
+
+def generate_infection_projections(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    starting_cases: Union[float, Sequence[float], np.ndarray],
+    growth_rates: Union[float, Sequence[float], np.ndarray],
+) -> pd.DataFrame:
+    """
+    Projects cases of many scenarios at once, as one long-form frame
+    with a row per scenario and day (counted from `start_date`).
+
+    `starting_cases` and `growth_rates` are broadcast against each other,
+    one entry per scenario. Growth rates can also vary per day, as a
+    (scenarios, days) array, where the rate of a day takes the cases
+    of the previous day to the ones of that day.
+    """
+    days = (end_date - start_date + datetime.timedelta(days=1)).days
+    starting_cases = np.atleast_1d(np.asarray(starting_cases, dtype=float))
+    growth_rates = np.asarray(growth_rates, dtype=float)
+
+    if growth_rates.ndim < 2:
+        growth_rates = np.atleast_1d(growth_rates)
+        starting_cases, growth_rates = np.broadcast_arrays(starting_cases, growth_rates)
+        # (scenarios, days)
+        factors = np.power(growth_rates[:, np.newaxis], np.arange(days))
+        daily_rates = np.repeat(growth_rates[:, np.newaxis], days, axis=1)
+    else:
+        if growth_rates.shape[1] != days:
+            raise ValueError(
+                f"Expected growth rates for {days} days, got {growth_rates.shape[1]}"
+            )
+        daily_rates = np.broadcast_to(
+            growth_rates, (max(len(starting_cases), len(growth_rates)), days)
+        )
+        starting_cases = np.broadcast_to(starting_cases, (len(daily_rates),))
+        factors = np.cumprod(
+            np.concatenate(
+                [np.ones((len(daily_rates), 1)), daily_rates[:, 1:]], axis=1
+            ),
+            axis=1,
+        )
+
+    cases = np.floor(starting_cases[:, np.newaxis] * factors).astype(np.int64)
+    scenarios, day_indices = np.indices(cases.shape)
+    return pd.DataFrame(
+        {
+            typedef.Columns.SCENARIO: scenarios.ravel(),
+            typedef.Columns.DATE: day_indices.ravel(),
+            typedef.Columns.CONFIRMED: cases.ravel(),
+            typedef.Columns.GROWTH_RATE: daily_rates.ravel(),
+        }
+    )
+
+
+# Header layouts of JHU daily reports, in the order they were introduced.
+JHU_HEADER_VARIANTS = (
+    # from 2020-01-22
+    ("Province/State", "Country/Region", "Last Update", "Confirmed", "Deaths", "Recovered"),
+    # from 2020-03-01
+    (
+        "Province/State",
+        "Country/Region",
+        "Last Update",
+        "Confirmed",
+        "Deaths",
+        "Recovered",
+        "Latitude",
+        "Longitude",
+    ),
+    # from 2020-03-22, with county (Admin2) level rows
+    (
+        "FIPS",
+        "Admin2",
+        "Province_State",
+        "Country_Region",
+        "Last_Update",
+        "Lat",
+        "Long_",
+        "Confirmed",
+        "Deaths",
+        "Recovered",
+        "Active",
+        "Combined_Key",
+    ),
+    # from 2020-05-29
+    (
+        "FIPS",
+        "Admin2",
+        "Province_State",
+        "Country_Region",
+        "Last_Update",
+        "Lat",
+        "Long_",
+        "Confirmed",
+        "Deaths",
+        "Recovered",
+        "Active",
+        "Combined_Key",
+        "Incidence_Rate",
+        "Case-Fatality_Ratio",
+    ),
+    # from 2020-11-09
+    (
+        "FIPS",
+        "Admin2",
+        "Province_State",
+        "Country_Region",
+        "Last_Update",
+        "Lat",
+        "Long_",
+        "Confirmed",
+        "Deaths",
+        "Recovered",
+        "Active",
+        "Combined_Key",
+        "Incident_Rate",
+        "Case_Fatality_Ratio",
+    ),
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class SyntheticScale:
+    days: int
+    countries: int
+    # per country
+    provinces: int
+    # per province
+    counties: int
+
+    def scaled(self, factor: int) -> "SyntheticScale":
+        # More locations per day, over the same period
+        return dataclasses.replace(self, counties=self.counties * factor)
+
+
+# Roughly the size of the JHU archive at the time of writing:
+# ~1100 daily reports with a few thousand rows each.
+JHU_SCALE = SyntheticScale(days=1100, countries=200, provinces=3, counties=5)
+
+
+def generate_jhu_daily_reports(
+    output_path: str,
+    scale: SyntheticScale,
+    start_date: datetime.date = datetime.date(2020, 1, 22),
+    seed: int = 0,
+) -> List[str]:
+    """
+    Writes `scale.days` synthetic daily reports to `output_path`, named and laid out
+    like JHU's. Periods of the range use each header variant in turn,
+    and variants without Admin2 get province level rows.
+    Counts follow a logistic curve per county, so they are cumulative and bounded.
+    """
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    rng = np.random.default_rng(seed)
+    num_counties = scale.countries * scale.provinces * scale.counties
+    countries = np.repeat(
+        # leading spaces, as found in a few of JHU's reports
+        [
+            f" Country {index:04d}" if index % 50 == 0 else f"Country {index:04d}"
+            for index in range(scale.countries)
         ],
+        scale.provinces * scale.counties,
     )
+    provinces = np.tile(
+        np.repeat(
+            [f"Province {index:03d}" for index in range(scale.provinces)],
+            scale.counties,
+        ),
+        scale.countries,
+    )
+    counties = np.tile(
+        [f"County {index:04d}" for index in range(scale.counties)],
+        scale.countries * scale.provinces,
+    )
+    capacity = rng.uniform(1e2, 1e5, size=num_counties)
+    rate = rng.uniform(0.02, 0.1, size=num_counties)
+    midpoint = rng.uniform(0, scale.days, size=num_counties)
+
+    files = []
+    for day in range(scale.days):
+        date = start_date + datetime.timedelta(days=day)
+        header = JHU_HEADER_VARIANTS[day * len(JHU_HEADER_VARIANTS) // scale.days]
+        confirmed = (capacity / (1 + np.exp(-rate * (day - midpoint)))).astype(np.int64)
+        df = pd.DataFrame(
+            {
+                "country": countries,
+                "province": provinces,
+                "county": counties,
+                "last_update": date.isoformat(),
+                "Confirmed": confirmed,
+                "Deaths": confirmed // 50,
+                "Recovered": confirmed * 4 // 5,
+            }
+        )
+        if "Admin2" in header:
+            names = {
+                "country": "Country_Region",
+                "province": "Province_State",
+                "county": "Admin2",
+                "last_update": "Last_Update",
+            }
+        else:
+            names = {
+                "country": "Country/Region",
+                "province": "Province/State",
+                "last_update": "Last Update",
+            }
+            df = (
+                df.drop(columns="county")
+                .groupby(["country", "province", "last_update"], sort=False)
+                .sum()
+                .reset_index()
+            )
+        df = df.rename(columns=names).reindex(columns=header)
+        file_path = os.path.join(output_path, date.strftime("%m-%d-%Y") + ".csv")
+        # The first layout came with a byte order mark.
+        df.to_csv(
+            file_path,
+            index=False,
+            encoding="utf-8-sig" if header == JHU_HEADER_VARIANTS[0] else "utf-8",
+        )
+        files.append(file_path)
+    return files
@@ -0,0 +1,138 @@
+"""
+Bookkeeping for incremental ingestion of JHU daily reports.
+Keeps a snapshot of parsed rows, together with the manifest of
+the files they were parsed from, in a single file.
+"""
+import dataclasses
+import hashlib
+import os
+import os.path
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+SNAPSHOT_FILE_NAME = "snapshot.pkl"
+# Bump whenever the layout of parsed rows changes,
+# so snapshots from older versions get rebuilt.
+SNAPSHOT_VERSION = 8
+
+
+@dataclasses.dataclass(frozen=True)
+class FileEntry:
+    path: str
+    size: int
+    mtime: float
+    digest: str
+
+
+@dataclasses.dataclass(frozen=True)
+class Changes:
+    # new or modified files, to be parsed
+    added: List[FileEntry]
+    # previous entries of modified or deleted files, whose rows are stale
+    removed: List[FileEntry]
+    entries: Dict[str, FileEntry]
+    # entries of files whose size or mtime changed but content didn't,
+    # to be saved so their digests aren't computed again
+    refreshed: List[FileEntry] = dataclasses.field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def compute_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, entries: Optional[Dict[str, FileEntry]] = None):
+        self.entries = entries or {}
+
+    def diff(self, files: List[str]) -> Changes:
+        added, removed, refreshed, entries = [], [], [], {}
+        for file_path in files:
+            stat = os.stat(file_path)
+            previous = self.entries.get(file_path)
+            if (
+                previous is not None
+                and previous.size == stat.st_size
+                and previous.mtime == stat.st_mtime
+            ):
+                entries[file_path] = previous
+                continue
+
+            # Size or mtime changed (e.g. after a fresh clone),
+            # only the content tells whether it needs parsing again.
+            entry = FileEntry(
+                path=file_path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                digest=compute_digest(file_path),
+            )
+            entries[file_path] = entry
+            if previous is not None and previous.digest == entry.digest:
+                refreshed.append(entry)
+                continue
+            added.append(entry)
+            if previous is not None:
+                removed.append(previous)
+
+        removed.extend(
+            entry for path, entry in self.entries.items() if path not in entries
+        )
+        return Changes(
+            added=added, removed=removed, entries=entries, refreshed=refreshed
+        )
+
+
+def load_snapshot(cache_path: str) -> Optional[Tuple[Manifest, pd.DataFrame]]:
+    """
+    The manifest and rows of the last snapshot, or None if there is none,
+    or if it can't be read or was saved by another version. Rows are only
+    ever used with the manifest saved along with them, so a snapshot
+    can't be mistaken for one of files it wasn't parsed from.
+    """
+    snapshot_path = os.path.join(cache_path, SNAPSHOT_FILE_NAME)
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as file:
+            content = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(content, dict) or content.get("version") != SNAPSHOT_VERSION:
+        return None
+    manifest = Manifest(
+        {entry["path"]: FileEntry(**entry) for entry in content["entries"]}
+    )
+    return manifest, content["rows"]
+
+
+def save_snapshot(cache_path: str, manifest: Manifest, df: pd.DataFrame) -> None:
+    content = {
+        "version": SNAPSHOT_VERSION,
+        "entries": [
+            dataclasses.asdict(entry) for _, entry in sorted(manifest.entries.items())
+        ],
+        "rows": df.reset_index(drop=True),
+    }
+    _write_atomically(
+        os.path.join(cache_path, SNAPSHOT_FILE_NAME),
+        lambda path: _dump_pickle(content, path),
+    )
+
+
+def _dump_pickle(content: Dict, path: str) -> None:
+    with open(path, "wb") as file:
+        pickle.dump(content, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _write_atomically(path: str, write_fn) -> None:
+    tmp_path = f"{path}.tmp"
+    write_fn(tmp_path)
+    os.replace(tmp_path, path)
@@ -0,0 +1,113 @@
+"""
+Dictionary encoding of location names, e.g. countries and provinces.
+Daily reports are parsed with categories of their own, and are
+recoded to the categories of a shared dictionary before they're joined,
+so the joined frame keeps compact categorical columns.
+"""
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def normalize(
+    column: pd.Series, aliases: Optional[Mapping[str, str]] = None
+) -> pd.Series:
+    """
+    Categorical `column` with surrounding whitespace stripped from names,
+    and `aliases` replaced with their canonical names.
+    Names are replaced once per category, rather than once per row.
+    """
+    # levels missing from a layout, e.g. counties in older reports
+    if column.isna().all():
+        column = column.astype(object)
+    column = column.astype("category")
+    categories = column.cat.categories
+    if len(categories) == 0:
+        return column
+    names = categories.str.strip()
+    if aliases:
+        names = names.map(lambda name: aliases.get(name, name))
+    if names.equals(categories):
+        return column
+    # categories can merge, e.g. "Italy" and "Italy ", or aliases of a name
+    codes, uniques = pd.factorize(names)
+    return pd.Series(
+        pd.Categorical.from_codes(
+            np.append(codes, -1)[column.cat.codes.to_numpy()], categories=uniques
+        ),
+        index=column.index,
+        name=column.name,
+    )
+
+
+class LocationDictionary:
+    """
+    Append only mapping of names to integer codes.
+    Codes of known names never change as names are added,
+    and frames encoded at once share the same `CategoricalDtype`.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._dtype: Optional[pd.CategoricalDtype] = None
+        self.add(names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, names: Iterable[str]) -> None:
+        for name in names:
+            if name not in self._codes:
+                self._codes[name] = len(self.names)
+                self.names.append(name)
+                self._dtype = None
+
+    @property
+    def dtype(self) -> pd.CategoricalDtype:
+        # the same instance until names are added
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(categories=self.names)
+        return self._dtype
+
+    def codes(self, names: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self._codes[name] for name in names), dtype=np.int64)
+
+    def encode(self, column: pd.Series) -> pd.Series:
+        """
+        Recodes the categorical `column` to the dictionary's categories,
+        with a lookup per category rather than per row. Names must be known.
+        """
+        categories = column.cat.categories
+        codes = column.cat.codes.to_numpy()
+        # e.g. a frame encoded before names were added, whose codes still hold
+        if not categories.equals(pd.Index(self.names[: len(categories)])):
+            codes = np.append(self.codes(categories), -1)[codes]
+        return pd.Series(
+            pd.Categorical.from_codes(codes, dtype=self.dtype),
+            index=column.index,
+            name=column.name,
+        )
+
+
+def encode_frames(
+    dfs: List[pd.DataFrame], dictionaries: Dict[str, LocationDictionary]
+) -> List[pd.DataFrame]:
+    """
+    Recodes the categorical columns of `dfs` named in `dictionaries`.
+    Names of all frames are added first, so every frame
+    ends up with the same categories, and can be concatenated as is.
+    """
+    for column_name, dictionary in dictionaries.items():
+        for df in dfs:
+            dictionary.add(df[column_name].cat.categories)
+    return [
+        df.assign(
+            **{
+                column_name: dictionary.encode(df[column_name])
+                for column_name, dictionary in dictionaries.items()
+            }
+        )
+        for df in dfs
+    ]
@@ -0,0 +1,108 @@
+"""
+Rolling window metrics of cumulative counts, for every location and the world.
+All metrics are differences and ratios of lagged cumulative counts,
+so they are computed together over the dense arrays of a `TimeSeriesStore`,
+without a groupby or rolling window per metric.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from covid19 import instrument
+from covid19 import typedef
+from covid19.data import timeseries
+
+METRIC_COLUMNS = (
+    typedef.Columns.NEW_CASES,
+    typedef.Columns.NEW_CASES_AVG_7,
+    typedef.Columns.NEW_CASES_AVG_14,
+    typedef.Columns.GROWTH_FACTOR,
+    typedef.Columns.DOUBLING_TIME,
+)
+
+
+def compute_metrics(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Metrics of a series x days array of cumulative counts:
+    daily new cases, their 7 and 14 day averages, the growth factor of
+    new cases over the last 7 days vs the 7 before, and the doubling time
+    of cumulative counts in days, at the pace of the last 7 days.
+    Metrics are NaN where their window starts before the first day,
+    and the doubling time is NaN when counts did not grow.
+    """
+    counts = counts.astype(float)
+    lag_1, lag_7, lag_14 = (_lag(counts, days) for days in (1, 7, 14))
+    new_cases_7 = counts - lag_7
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth_factor = np.where(
+            lag_7 - lag_14 > 0, new_cases_7 / (lag_7 - lag_14), np.nan
+        )
+        ratio = np.where(lag_7 > 0, counts / lag_7, np.nan)
+        doubling_time = np.where(ratio > 1, 7 * np.log(2) / np.log(ratio), np.nan)
+    return {
+        typedef.Columns.NEW_CASES: counts - lag_1,
+        typedef.Columns.NEW_CASES_AVG_7: np.round(new_cases_7 / 7, 3),
+        typedef.Columns.NEW_CASES_AVG_14: np.round((counts - lag_14) / 14, 3),
+        typedef.Columns.GROWTH_FACTOR: np.round(growth_factor, 3),
+        typedef.Columns.DOUBLING_TIME: np.round(doubling_time, 3),
+    }
+
+
+@instrument.instrumented()
+def generate_metrics(df_region_agg_confirmed: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Metrics of confirmed cases per location, and of the world, keyed
+    "region-metrics" and "world-metrics", with a row per reported date.
+    Counts of days without a report carry over from the last report,
+    so gaps in the reports don't show up as drops in new cases,
+    and world counts are the sum of those.
+    """
+    store = timeseries.TimeSeriesStore.from_frame(
+        df_region_agg_confirmed, columns=[typedef.Columns.CONFIRMED]
+    )
+    counts = _carry_forward(store.values[typedef.Columns.CONFIRMED], store.observed)
+    # the world is the last series, so both are computed in one go
+    all_counts = np.vstack([counts, counts.sum(axis=0)])
+    all_metrics = compute_metrics(all_counts)
+
+    location_positions, date_positions = np.nonzero(store.observed)
+    df_region = pd.DataFrame(
+        {
+            typedef.Columns.REGION: pd.Categorical.from_codes(
+                location_positions, categories=store.locations
+            ),
+            typedef.Columns.DATE: store.dates[date_positions],
+            typedef.Columns.CONFIRMED: counts[location_positions, date_positions],
+        }
+    )
+    for column_name, array in all_metrics.items():
+        df_region[column_name] = array[location_positions, date_positions]
+
+    reported_dates = np.flatnonzero(store.observed.any(axis=0))
+    df_world = pd.DataFrame(
+        {
+            typedef.Columns.DATE: store.dates[reported_dates],
+            typedef.Columns.CONFIRMED: all_counts[-1, reported_dates],
+        }
+    )
+    for column_name, array in all_metrics.items():
+        df_world[column_name] = array[-1, reported_dates]
+    return {"region-metrics": df_region, "world-metrics": df_world}
+
+
+def _lag(array: np.ndarray, days: int) -> np.ndarray:
+    lagged = np.full(array.shape, np.nan)
+    lagged[:, days:] = array[:, :-days]
+    return lagged
+
+
+def _carry_forward(values: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    Fills the values of unobserved days with those of the last observed day,
+    or zero before the first one.
+    """
+    positions = np.where(observed, np.arange(values.shape[1]), -1)
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    filled = np.take_along_axis(values, np.maximum(positions, 0), axis=1)
+    return np.where(positions >= 0, filled, 0)
@@ -1,36 +1,94 @@
 import argparse
-import copy
+import concurrent.futures
 import datetime
 import os.path
-from typing import Dict, Set, List
+from typing import Callable, Dict, List, Optional
 import dataclasses
 
+import numpy as np
 import pandas as pd
-import calendar
+from covid19 import aliases
 from covid19 import constants
+from covid19 import instrument
 from covid19 import typedef
+from covid19.data import cache
+from covid19.data import fit
+from covid19.data import ingest
+from covid19.data import locations
+from covid19.data import metrics
+from covid19.data import schema
+from covid19.data import storage
+
+
+DATASET_FILES = {
+    "region-agg-confirmed": constants.FILE_REGION_AGG_JHU_CONFIRMED,
+    "region-agg-growth-rate": constants.FILE_REGION_AGG_JHU_GROWTH_RATE,
+    "world-agg-confirmed": constants.FILE_WORLD_AGG_JHU_CONFIRMED,
+    "world-agg-growth-rate": constants.FILE_WORLD_AGG_JHU_GROWTH_RATE,
+    "province-agg-confirmed": constants.FILE_PROVINCE_AGG_JHU_CONFIRMED,
+    "county-agg-confirmed": constants.FILE_COUNTY_AGG_JHU_CONFIRMED,
+    "region-projection": constants.FILE_REGION_PROJECTION_JHU,
+    "region-metrics": constants.FILE_REGION_METRICS_JHU,
+    "world-metrics": constants.FILE_WORLD_METRICS_JHU,
+}
+
+# Geographic levels of the reports, from the coarsest to the finest.
+# Levels a report doesn't break down to, e.g. provinces of countries
+# reported as a whole, are missing.
+HIERARCHY = (
+    typedef.Columns.REGION,
+    typedef.Columns.PROVINCE,
+    typedef.Columns.COUNTY,
+)
 
 
 @dataclasses.dataclass(frozen=True)
 class Args:
     input_path: str
     output_path: str
+    incremental: bool
+    cache_path: Optional[str]
+    workers: int
+    format: str
 
 
 def generate_entries_spanning_period(
-    start_date: datetime.date,
-    end_date: datetime.date,
-    values: Dict[datetime.date, Dict[str, int]],
-    locations: Set[str],
+    df: pd.DataFrame,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
 ) -> pd.DataFrame:
-    days = (end_date - start_date + datetime.timedelta(days=1)).days
-    entries = []
-    # date / location / value
-    for day in range(days):
-        date = start_date + datetime.timedelta(day)
-        for location in locations:
-            entries.append([location, date, values[date][location]])
-    return pd.DataFrame(data=entries, columns=["location", "date", "count"],)
+    """
+    Fills in the days without a report of `df`, a frame of cumulative counts
+    with a row per date, and per location if it has a `Columns.REGION` column.
+    Rows span every day up to `end_date`, or the last report, from `start_date`,
+    or the first report, of each location. Counts of filled in days
+    carry over from the last report, and are flagged in `Columns.IMPUTED`.
+    """
+    dates = pd.date_range(
+        start_date or df[typedef.Columns.DATE].min(),
+        end_date or df[typedef.Columns.DATE].max(),
+        freq="D",
+        name=typedef.Columns.DATE,
+    )
+    if typedef.Columns.REGION in df.columns:
+        df_reported = df.set_index([typedef.Columns.REGION, typedef.Columns.DATE])
+        index = pd.MultiIndex.from_product(
+            [df[typedef.Columns.REGION].unique(), dates],
+            names=[typedef.Columns.REGION, typedef.Columns.DATE],
+        )
+        df_grid = (
+            df_reported.reindex(index)
+            .groupby(level=typedef.Columns.REGION, observed=True, sort=False)
+            .ffill()
+        )
+    else:
+        df_reported = df.set_index(typedef.Columns.DATE)
+        df_grid = df_reported.reindex(dates).ffill()
+
+    df_grid[typedef.Columns.IMPUTED] = ~df_grid.index.isin(df_reported.index)
+    # days before the first report of a location
+    df_grid = df_grid.dropna(subset=df_reported.columns[:1])
+    return df_grid.reset_index().astype(df.dtypes.to_dict())
 
 
 def get_jhu_files(input_path: str) -> List[str]:
@@ -41,182 +99,527 @@ def get_jhu_files(input_path: str) -> List[str]:
     ]
 
 
+def get_jhu_log_date(file_path: str) -> datetime.datetime:
+    file_name, _ = os.path.splitext(os.path.basename(file_path))
+    return datetime.datetime.strptime(file_name, "%m-%d-%Y")
+
+
 def read_jhu_log(file_path: str) -> pd.DataFrame:
-    date = datetime.datetime.strptime(
-        os.path.basename(file_path).rstrip(".csv"), "%m-%d-%Y"
+    date = get_jhu_log_date(file_path)
+    type_mapping = typedef.Columns.type_mapping()
+    # Only parse the columns we keep, with compact types,
+    # as resolved from the header line of the file.
+    file_schema = schema.resolve_file(file_path)
+    df_daily = pd.read_csv(
+        file_path,
+        encoding="utf-8-sig",
+        usecols=file_schema.usecols,
+        dtype=file_schema.dtype,
     )
-    df_daily = pd.read_csv(file_path)
-    column_mapping = {
-        column_name: column_name.replace("/", "_").replace(" ", "_")
-        for column_name in df_daily.columns
-    }
-    df_daily = df_daily.rename(column_mapping, axis=1)
-    df_daily = df_daily.rename(typedef.Columns.name_mapping(), axis=1)
-    df_daily = df_daily[
-        [
-            typedef.Columns.REGION,
+    df_daily = df_daily.rename(file_schema.name_mapping, axis=1)
+    df_daily = df_daily.reindex(
+        columns=[
+            *HIERARCHY,
             typedef.Columns.CONFIRMED,
             typedef.Columns.RECOVERED,
             typedef.Columns.DEATHS,
         ]
-    ]
+    )
     df_daily[typedef.Columns.DATE] = date
 
-    for column_name, type_ in typedef.Columns.type_mapping().items():
-        if type_ == "int64":
+    for column_name, type_ in type_mapping.items():
+        if type_.startswith("int"):
             df_daily[column_name] = df_daily[column_name].fillna(0)
         elif type_ == "category":
-            df_daily[column_name] = df_daily[column_name].apply(lambda element: element.strip())
+            df_daily[column_name] = locations.normalize(
+                df_daily[column_name], aliases.LOCATION_ALIASES.get(column_name)
+            )
         df_daily[column_name] = df_daily[column_name].astype(type_)
     return df_daily
 
 
-def join_jhu_logs(input_path: str) -> pd.DataFrame:
+def aggregate_jhu_log(df_daily: pd.DataFrame) -> pd.DataFrame:
+    # Each report covers a single date, so totals per county
+    # are final and the raw rows can be dropped right away.
+    # Totals are int64, as they are once written and read back.
+    df_daily = df_daily.astype(
+        {
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.DEATHS: "int64",
+            typedef.Columns.RECOVERED: "int64",
+        }
+    )
+    return sum_by(
+        df_daily[df_daily[typedef.Columns.REGION].notna()],
+        [*HIERARCHY, typedef.Columns.DATE],
+    )
+
+
+def sum_by(df: pd.DataFrame, key_names: List[str]) -> pd.DataFrame:
+    """
+    Sums the other columns of `df` by `key_names`. Missing categorical keys
+    are kept as a group of their own, which pandas 1.x drops even
+    with `dropna=False`, by grouping on the category codes.
+    """
+    dtypes = {
+        column_name: df[column_name].dtype
+        for column_name in key_names
+        if isinstance(df[column_name].dtype, pd.CategoricalDtype)
+    }
+    df_sum = (
+        df.assign(
+            **{column_name: df[column_name].cat.codes for column_name in dtypes}
+        )
+        .groupby(key_names)
+        .sum()
+        .reset_index()
+    )
+    for column_name, dtype in dtypes.items():
+        df_sum[column_name] = pd.Categorical.from_codes(
+            df_sum[column_name], dtype=dtype
+        )
+    return df_sum
+
+
+@instrument.instrumented()
+def rollup(df_county_agg: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Totals per date of each level of `HIERARCHY`, keyed by level.
+    `df_county_agg` must hold totals of the finest level, as
+    `aggregate_jhu_log` leaves them, and each coarser level is summed from the
+    level below it, so the rows of the finest level are only grouped once.
+    """
+    df_level = df_county_agg.astype(
+        {column_name: "category" for column_name in HIERARCHY}
+    )
+    levels = {HIERARCHY[-1]: df_level}
+    for depth in range(len(HIERARCHY) - 1, 0, -1):
+        df_level = sum_by(
+            df_level.drop(columns=HIERARCHY[depth]),
+            [*HIERARCHY[:depth], typedef.Columns.DATE],
+        )
+        levels[HIERARCHY[depth - 1]] = df_level
+    return levels
+
+
+def read_and_aggregate_jhu_log(file_path: str) -> pd.DataFrame:
+    return aggregate_jhu_log(read_jhu_log(file_path))
+
+
+def read_jhu_logs(
+    files: List[str],
+    workers: int = 1,
+    read_fn: Callable[[str], pd.DataFrame] = read_jhu_log,
+) -> List[pd.DataFrame]:
+    """
+    Parses daily reports with `read_fn`, fanning out over `workers` processes.
+    Frames are returned in report date order, regardless of `workers`.
+    """
+    files = sorted(files, key=get_jhu_log_date)
+    if workers <= 1 or len(files) <= 1:
+        return [read_fn(file_path) for file_path in files]
+
+    # Submit files in chunks, so each worker round trip
+    # amortizes the pickling overhead over several files.
+    chunksize = max(1, len(files) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_fn, files, chunksize=chunksize))
+
+
+@instrument.instrumented()
+def join_jhu_logs(
+    input_path: str, workers: int = 1, aggregate: bool = False
+) -> pd.DataFrame:
+    """
+    Joins all daily reports. With `aggregate`, each report is reduced
+    to totals per county as it is read, so memory is bounded by
+    the aggregated output rather than the raw rows.
+    """
     files = get_jhu_files(input_path)
-    dfs = []
-    for file_path in files:
-        df_daily = read_jhu_log(file_path)
-        dfs.append(df_daily)
-    return pd.concat(dfs, axis=0)
+    dfs = read_jhu_logs(
+        files,
+        workers=workers,
+        read_fn=read_and_aggregate_jhu_log if aggregate else read_jhu_log,
+    )
+    dictionaries = {
+        column_name: locations.LocationDictionary() for column_name in HIERARCHY
+    }
+    return pd.concat(locations.encode_frames(dfs, dictionaries), axis=0)
+
 
+@instrument.instrumented()
+def join_jhu_logs_incremental(
+    input_path: str, cache_path: str, workers: int = 1
+) -> pd.DataFrame:
+    """
+    Same as `join_jhu_logs` with `aggregate`, but only parses files that
+    are new or changed since the last run, reusing the rows cached for the rest.
+    """
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_path)
+
+    snapshot = ingest.load_snapshot(cache_path)
+    if snapshot is None:
+        manifest, df_snapshot = ingest.Manifest(), None
+    else:
+        manifest, df_snapshot = snapshot
+    changes = manifest.diff(get_jhu_files(input_path))
 
-def process_data_from_jhu(input_path: str, output_path: str) -> None:
+    dfs = []
+    # codes of locations in the snapshot carry over, new ones are appended
+    dictionaries = {
+        column_name: locations.LocationDictionary(
+            df_snapshot[column_name].cat.categories if df_snapshot is not None else ()
+        )
+        for column_name in HIERARCHY
+    }
+    if df_snapshot is not None:
+        stale_dates = [get_jhu_log_date(entry.path) for entry in changes.removed]
+        dfs.append(df_snapshot[~df_snapshot[typedef.Columns.DATE].isin(stale_dates)])
+    dfs.extend(
+        read_jhu_logs(
+            [entry.path for entry in changes.added],
+            workers=workers,
+            read_fn=read_and_aggregate_jhu_log,
+        )
+    )
+    df_raw = pd.concat(locations.encode_frames(dfs, dictionaries), axis=0)
+
+    if changes or changes.refreshed or df_snapshot is None:
+        ingest.save_snapshot(cache_path, ingest.Manifest(changes.entries), df_raw)
+    return df_raw
+
+
+@instrument.instrumented()
+def process_data_from_jhu(
+    input_path: str,
+    output_path: str,
+    incremental: bool = False,
+    cache_path: Optional[str] = None,
+    workers: int = 1,
+    format_: str = "csv",
+) -> Dict[str, pd.DataFrame]:
+    """
+    Processes the daily reports in `input_path`, and writes the datasets to `output_path`.
+    The datasets are returned too, keyed like `read_proc_data`, before any date filtering.
+    """
     if not os.path.exists(output_path):
         os.makedirs(output_path)
 
-    df_raw = join_jhu_logs(input_path)
-    df_region_agg_confirmed = (
-        df_raw.groupby([typedef.Columns.REGION, typedef.Columns.DATE])
-        .sum()
-        .reset_index()
-    )
+    if incremental:
+        df_daily_agg = join_jhu_logs_incremental(
+            input_path,
+            cache_path or os.path.join(output_path, ".cache"),
+            workers=workers,
+        )
+    else:
+        df_daily_agg = join_jhu_logs(input_path, workers=workers, aggregate=True)
+    levels = rollup(df_daily_agg)
+    df_region_agg_confirmed = levels[typedef.Columns.REGION]
     df_region_agg_growth_rate = generate_regional_growth_rate_metrics(
         df_region_agg_confirmed
     )
+    df_region_projection = fit.generate_regional_projections(df_region_agg_confirmed)
 
-    df_world_agg_confirmed = (
-        df_region_agg_confirmed[[typedef.Columns.DATE, typedef.Columns.CONFIRMED]]
-        .groupby([typedef.Columns.DATE])
-        .sum()
-        .reset_index()
-    )
-
+    df_world_agg_confirmed = aggregate_world(df_region_agg_growth_rate)
     df_world_agg_growth_rate = pd.DataFrame(
         {typedef.Columns.DATE: df_world_agg_confirmed[typedef.Columns.DATE]}
     )
     df_world_agg_growth_rate[typedef.Columns.GROWTH_RATE] = compute_rate_of_new_cases(
-        df_world_agg_confirmed[typedef.Columns.CONFIRMED]
+        df_world_agg_confirmed[typedef.Columns.CONFIRMED],
+        imputed=df_world_agg_confirmed[typedef.Columns.IMPUTED],
     )
 
-    df_region_agg_confirmed.to_csv(
-        os.path.join(output_path, constants.FILE_REGION_AGG_JHU_CONFIRMED),
-        index=False,
-        header=True,
-    )
-    df_region_agg_growth_rate.to_csv(
-        os.path.join(output_path, constants.FILE_REGION_AGG_JHU_GROWTH_RATE),
-        index=False,
-        header=True,
-    )
-    df_world_agg_confirmed.to_csv(
-        os.path.join(output_path, constants.FILE_WORLD_AGG_JHU_CONFIRMED),
-        index=False,
-        header=True,
-    )
-    df_world_agg_growth_rate.to_csv(
-        os.path.join(output_path, constants.FILE_WORLD_AGG_JHU_GROWTH_RATE),
-        index=False,
-        header=True,
-    )
+    datasets = {
+        "region-agg-confirmed": df_region_agg_confirmed,
+        "region-agg-growth-rate": df_region_agg_growth_rate,
+        "world-agg-confirmed": df_world_agg_confirmed,
+        "world-agg-growth-rate": df_world_agg_growth_rate,
+        "province-agg-confirmed": levels[typedef.Columns.PROVINCE],
+        "county-agg-confirmed": levels[typedef.Columns.COUNTY],
+        "region-projection": df_region_projection,
+        **metrics.generate_metrics(df_region_agg_confirmed),
+    }
+    with instrument.stage("write_datasets"):
+        for name, df in datasets.items():
+            storage.write_dataset(df, output_path, DATASET_FILES[name], format_)
+    return datasets
 
 
+@instrument.instrumented()
 def generate_regional_growth_rate_metrics(
     df_region_agg_confirmed: pd.DataFrame,
 ) -> pd.DataFrame:
-    locations = set(df_region_agg_confirmed[typedef.Columns.REGION].unique())
-
-    dfs = []
-    for location in locations:
-        df_location = df_region_agg_confirmed[
-            df_region_agg_confirmed[typedef.Columns.REGION] == location
-        ].copy()
-        df_location = df_location.reset_index(drop=True)
-        df_location[typedef.Columns.GROWTH_RATE] = compute_rate_of_new_cases(
-            df_location[typedef.Columns.CONFIRMED]
+    # days without a report get a row, with no rate, rather than being skipped
+    df = generate_entries_spanning_period(
+        df_region_agg_confirmed.sort_values(
+            [typedef.Columns.REGION, typedef.Columns.DATE]
         )
-        dfs.append(df_location)
-    df = pd.concat(dfs, axis=0)
+    )
+    df[typedef.Columns.GROWTH_RATE] = compute_rate_of_new_cases(
+        df[typedef.Columns.CONFIRMED],
+        by=df[typedef.Columns.REGION],
+        imputed=df[typedef.Columns.IMPUTED],
+    )
     return df
 
 
-def compute_rate_of_new_cases(count: pd.Series) -> pd.Series:
-    growth_rate = count.astype(float) / pd.Series([0] + list(count.values[:-1])).astype(
-        float
+@instrument.instrumented()
+def aggregate_world(df_region_agg_growth_rate: pd.DataFrame) -> pd.DataFrame:
+    """
+    World totals per date, summed over the locations of `df_region_agg_growth_rate`,
+    whose counts carry over days without a report, as `metrics.generate_metrics` does,
+    so a location missing from a report doesn't show up as a dip.
+    A date is imputed when no location reported on it.
+    """
+    return (
+        df_region_agg_growth_rate.groupby(typedef.Columns.DATE)
+        .agg(
+            {
+                typedef.Columns.CONFIRMED: "sum",
+                typedef.Columns.IMPUTED: "all",
+            }
+        )
+        .reset_index()
+    )
+
+
+def compute_rate_of_new_cases(
+    count: pd.Series,
+    by: Optional[pd.Series] = None,
+    imputed: Optional[pd.Series] = None,
+) -> pd.Series:
+    """
+    Ratio of each count over the previous one, within each group of `by`
+    if given. `count` must be sorted by date (within each group).
+    The first entry of each group and entries following a zero count
+    have no defined rate, and are set to NaN.
+    With `imputed`, flagging counts carried over a gap in the reports,
+    the rates of those entries and of the first report after them
+    are NaN too, since the growth over the gap all shows up on that report.
+    """
+    if by is None:
+        previous = count.shift(1)
+    else:
+        previous = count.groupby(by, observed=True, sort=False).shift(1)
+    growth_rate = count.astype(float) / previous.astype(float)
+    defined = previous > 0
+    if imputed is not None:
+        if by is None:
+            previous_imputed = imputed.shift(1, fill_value=False)
+        else:
+            previous_imputed = imputed.groupby(by, observed=True, sort=False).shift(
+                1, fill_value=False
+            )
+        defined &= ~imputed & ~previous_imputed
+    return growth_rate.where(defined).round(3)
+
+
+# Datasets read by `read_proc_data`
+PROC_DATASETS = (
+    "region-agg-confirmed",
+    "region-agg-growth-rate",
+    "world-agg-confirmed",
+    "world-agg-growth-rate",
+    "region-projection",
+    "region-metrics",
+    "world-metrics",
+)
+
+
+@instrument.instrumented()
+def read_proc_data(
+    path: str, format_: str = "csv", use_cache: bool = True, filtered: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """
+    Reads the processed datasets, filtered by `filter_proc_data` if `filtered`.
+    With `use_cache`, datasets are read once per process, and
+    again only when their files change. Cached frames are read-only.
+    """
+    if not use_cache:
+        return _read_proc_data(path, format_, filtered)
+    return cache.DATASET_CACHE.get_or_read(
+        (os.path.abspath(path), format_, filtered),
+        [
+            storage.dataset_path(path, DATASET_FILES[name], format_)
+            for name in PROC_DATASETS
+        ],
+        lambda: _read_proc_data(path, format_, filtered),
     )
-    return growth_rate.map(lambda x: round(x, ndigits=3))
 
 
-def read_proc_data(path: str) -> Dict[str, pd.DataFrame]:
-    df_region_agg_confirmed = pd.read_csv(
-        os.path.join(path, constants.FILE_REGION_AGG_JHU_CONFIRMED),
-        header="infer",
-        dtype={typedef.Columns.CONFIRMED: "int64", typedef.Columns.REGION: "category"},
-        parse_dates=[typedef.Columns.DATE],
+def _read_proc_data(
+    path: str, format_: str, filtered: bool
+) -> Dict[str, pd.DataFrame]:
+    df_region_agg_confirmed = storage.read_dataset(
+        path,
+        constants.FILE_REGION_AGG_JHU_CONFIRMED,
+        format_,
+        dtype={
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.REGION: "category",
+            typedef.Columns.DATE: "datetime64[ns]",
+        },
     )
-    df_region_agg_growth_rate = pd.read_csv(
-        os.path.join(path, constants.FILE_REGION_AGG_JHU_GROWTH_RATE),
-        header="infer",
+    df_region_agg_growth_rate = storage.read_dataset(
+        path,
+        constants.FILE_REGION_AGG_JHU_GROWTH_RATE,
+        format_,
         dtype={
             typedef.Columns.CONFIRMED: "int64",
             typedef.Columns.GROWTH_RATE: "float64",
+            typedef.Columns.IMPUTED: "bool",
             typedef.Columns.REGION: "category",
+            typedef.Columns.DATE: "datetime64[ns]",
         },
-        parse_dates=[typedef.Columns.DATE],
     )
-    df_world_agg_confirmed = pd.read_csv(
-        os.path.join(path, constants.FILE_WORLD_AGG_JHU_CONFIRMED),
-        header="infer",
-        dtype={typedef.Columns.CONFIRMED: "int64"},
-        parse_dates=[typedef.Columns.DATE],
+    df_world_agg_confirmed = storage.read_dataset(
+        path,
+        constants.FILE_WORLD_AGG_JHU_CONFIRMED,
+        format_,
+        dtype={
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.IMPUTED: "bool",
+            typedef.Columns.DATE: "datetime64[ns]",
+        },
     )
-    df_world_agg_growth_rate = pd.read_csv(
-        os.path.join(path, constants.FILE_WORLD_AGG_JHU_GROWTH_RATE),
-        header="infer",
+    df_world_agg_growth_rate = storage.read_dataset(
+        path,
+        constants.FILE_WORLD_AGG_JHU_GROWTH_RATE,
+        format_,
         dtype={
             typedef.Columns.CONFIRMED: "int64",
             typedef.Columns.GROWTH_RATE: "float64",
+            typedef.Columns.DATE: "datetime64[ns]",
+        },
+    )
+    df_region_projection = storage.read_dataset(
+        path,
+        constants.FILE_REGION_PROJECTION_JHU,
+        format_,
+        dtype={
+            typedef.Columns.CONFIRMED: "Int64",
+            typedef.Columns.PROJECTED: "float64",
+            typedef.Columns.GROWTH_RATE: "float64",
+            typedef.Columns.MODEL: "category",
+            typedef.Columns.REGION: "category",
+            typedef.Columns.DATE: "datetime64[ns]",
+        },
+    )
+    metric_dtypes = {
+        column_name: "float64" for column_name in metrics.METRIC_COLUMNS
+    }
+    df_region_metrics = storage.read_dataset(
+        path,
+        constants.FILE_REGION_METRICS_JHU,
+        format_,
+        dtype={
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.REGION: "category",
+            typedef.Columns.DATE: "datetime64[ns]",
+            **metric_dtypes,
+        },
+    )
+    df_world_metrics = storage.read_dataset(
+        path,
+        constants.FILE_WORLD_METRICS_JHU,
+        format_,
+        dtype={
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.DATE: "datetime64[ns]",
+            **metric_dtypes,
         },
-        parse_dates=[typedef.Columns.DATE],
     )
     datasets = {
-        "region-agg-confirmed": filter_dates(df_region_agg_confirmed, "months"),
-        "region-agg-growth-rate": filter_dates(df_region_agg_growth_rate, "months"),
-        "world-agg-confirmed": filter_dates(df_world_agg_confirmed, "weeks"),
-        "world-agg-growth-rate": filter_dates(df_world_agg_growth_rate, "weeks"),
+        "region-agg-confirmed": df_region_agg_confirmed,
+        "region-agg-growth-rate": df_region_agg_growth_rate,
+        "world-agg-confirmed": df_world_agg_confirmed,
+        "world-agg-growth-rate": df_world_agg_growth_rate,
+        "region-projection": df_region_projection,
+        "region-metrics": df_region_metrics,
+        "world-metrics": df_world_metrics,
     }
+    return filter_proc_data(datasets) if filtered else datasets
 
-    return datasets
 
+@instrument.instrumented()
+def read_level_data(
+    path: str, level: str, format_: str = "csv"
+) -> pd.DataFrame:
+    """
+    Reads the totals of a level of `HIERARCHY` below countries, e.g. provinces.
+    """
+    depth = HIERARCHY.index(level) + 1
+    return storage.read_dataset(
+        path,
+        DATASET_FILES[f"{level}-agg-confirmed"],
+        format_,
+        dtype={
+            **{column_name: "category" for column_name in HIERARCHY[:depth]},
+            typedef.Columns.DATE: "datetime64[ns]",
+            typedef.Columns.CONFIRMED: "int64",
+            typedef.Columns.DEATHS: "int64",
+            typedef.Columns.RECOVERED: "int64",
+        },
+    )
 
-def filter_dates(df: pd.DataFrame, type_: str) -> pd.DataFrame:
-    def is_end_of_month(date: datetime.date) -> bool:
-        (_, last_day) = calendar.monthrange(date.year, date.month)
-        return date.day == last_day
-    
-    def is_week_start(date: datetime.date) -> bool:
-        # We consider Mondays the
-        # beginning the week.
-        return date.weekday() == 0
-    
-    if type_ == "months":
-        filter_fn = is_end_of_month
-    elif type_ == "weeks":
-        filter_fn = is_week_start
-    else:
+
+@instrument.instrumented()
+def filter_proc_data(datasets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    return {
+        "region-agg-confirmed": filter_dates(datasets["region-agg-confirmed"], "months"),
+        "region-agg-growth-rate": filter_dates(
+            datasets["region-agg-growth-rate"], "months"
+        ),
+        "world-agg-confirmed": filter_dates(datasets["world-agg-confirmed"], "weeks"),
+        "world-agg-growth-rate": filter_dates(datasets["world-agg-growth-rate"], "weeks"),
+        # projections only span the last days, and are kept whole
+        "region-projection": datasets["region-projection"],
+        "region-metrics": filter_dates(datasets["region-metrics"], "months"),
+        "world-metrics": filter_dates(datasets["world-metrics"], "weeks"),
+    }
+
+
+DATE_FILTER_RULES = {
+    "months": "M",
+    # We consider Mondays the
+    # beginning the week.
+    "weeks": "W-MON",
+}
+
+
+def filter_dates(df: pd.DataFrame, type_: str, how: str = "on_offset") -> pd.DataFrame:
+    """
+    Downsamples `df` to the dates of `type_`: "months" (end of month),
+    "weeks" (week start), or any pandas offset alias, e.g. "SM" or "W-SUN".
+    With `how="on_offset"`, rows dated exactly on the offset are kept.
+    With `how="last"`, the last row of each period is kept, per location
+    for regional frames, so gaps in the reports don't drop a period.
+    """
+    rule = DATE_FILTER_RULES.get(type_, type_)
+    try:
+        offset = pd.tseries.frequencies.to_offset(rule)
+    except ValueError:
         raise ValueError(f"Unknown filter {type_}")
-    mask = df["date"].map(filter_fn)
-    return copy.deepcopy(df[mask])
-    # return df_.resample("M", "first").reset_index()
+
+    dates = df[typedef.Columns.DATE]
+    if df.empty:
+        return df
+    if how == "on_offset":
+        anchors = pd.date_range(dates.min().normalize(), dates.max(), freq=offset)
+        return df[dates.isin(anchors)]
+    if how == "last":
+        keys = [pd.Grouper(key=typedef.Columns.DATE, freq=offset)]
+        if typedef.Columns.REGION in df.columns:
+            keys.insert(0, typedef.Columns.REGION)
+        positions = (
+            df.assign(position=np.arange(len(df)))
+            .sort_values(typedef.Columns.DATE)
+            .groupby(keys, observed=True)["position"]
+            .last()
+        )
+        return df.iloc[np.sort(positions.to_numpy())]
+    raise ValueError(f"Unknown method {how}")
 
 
 def parse_args() -> Args:
@@ -227,10 +630,39 @@ def parse_args() -> Args:
     arg_parser.add_argument(
         "--output-path", required=True, help="Dir to save csv with processed data"
     )
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only parse daily reports that are new or changed since the last run",
+    )
+    arg_parser.add_argument(
+        "--cache-path",
+        default=None,
+        help="Dir for the incremental ingestion cache. Defaults to <output-path>/.cache",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse daily reports",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=storage.FORMATS,
+        default="csv",
+        help="File format of the processed data",
+    )
     kwargs, _ = arg_parser.parse_known_args()
     return Args(**vars(kwargs))
 
 
 if __name__ == "__main__":
     args = parse_args()
-    process_data_from_jhu(args.input_path, output_path=args.output_path)
\ No newline at end of file
+    process_data_from_jhu(
+        args.input_path,
+        output_path=args.output_path,
+        incremental=args.incremental,
+        cache_path=args.cache_path,
+        workers=args.workers,
+        format_=args.format,
+    )
\ No newline at end of file
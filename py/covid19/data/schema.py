@@ -0,0 +1,64 @@
+"""
+Registry of JHU daily report header layouts.
+Each distinct header line is resolved once to the
+columns we keep, their canonical names and parse types.
+"""
+import csv
+import dataclasses
+import functools
+from typing import Dict, Tuple
+
+from covid19 import typedef
+
+
+@dataclasses.dataclass(frozen=True)
+class Schema:
+    # raw names of the columns to parse, in file order
+    usecols: Tuple[str, ...]
+    # raw name -> canonical name
+    name_mapping: Dict[str, str]
+    # raw name -> type to parse with
+    dtype: Dict[str, str]
+
+
+def read_header(file_path: str) -> str:
+    with open(file_path, encoding="utf-8-sig") as file:
+        return file.readline().strip()
+
+
+def normalize_column_name(column_name: str) -> str:
+    return column_name.strip().replace("/", "_").replace(" ", "_")
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_header(header: str) -> Schema:
+    known_names = {
+        normalize_column_name(column_name): canonical_name
+        for column_name, canonical_name in typedef.Columns.name_mapping().items()
+    }
+    type_mapping = typedef.Columns.type_mapping()
+    (column_names,) = csv.reader([header])
+
+    name_mapping = {}
+    for column_name in column_names:
+        canonical_name = known_names.get(normalize_column_name(column_name))
+        if canonical_name is not None and canonical_name not in name_mapping.values():
+            name_mapping[column_name] = canonical_name
+
+    return Schema(
+        usecols=tuple(name_mapping.keys()),
+        name_mapping=name_mapping,
+        dtype={
+            # counts are nullable while parsing, since reports leave cells empty
+            column_name: _parse_type(type_mapping[canonical_name])
+            for column_name, canonical_name in name_mapping.items()
+        },
+    )
+
+
+def resolve_file(file_path: str) -> Schema:
+    return resolve_header(read_header(file_path))
+
+
+def _parse_type(type_: str) -> str:
+    return type_.capitalize() if type_.startswith("int") else type_
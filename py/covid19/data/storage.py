@@ -0,0 +1,60 @@
+"""
+Reading and writing of processed datasets.
+Columnar formats (parquet, feather) need pyarrow,
+and keep dtypes, e.g. categories and dates, as written.
+"""
+import os.path
+from typing import Dict
+
+import pandas as pd
+
+from covid19 import typedef
+
+FORMATS = ("csv", "parquet", "feather")
+
+
+def dataset_path(path: str, file_name: str, format_: str) -> str:
+    if format_ not in FORMATS:
+        raise ValueError(f"Unknown format {format_}")
+    stem, _ = os.path.splitext(file_name)
+    return os.path.join(path, f"{stem}.{format_}")
+
+
+def write_dataset(df: pd.DataFrame, path: str, file_name: str, format_: str) -> None:
+    file_path = dataset_path(path, file_name, format_)
+    if format_ == "csv":
+        df.to_csv(file_path, index=False, header=True)
+    elif format_ == "parquet":
+        df.to_parquet(file_path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(file_path)
+
+
+def read_dataset(
+    path: str, file_name: str, format_: str, dtype: Dict[str, str]
+) -> pd.DataFrame:
+    file_path = dataset_path(path, file_name, format_)
+    if format_ == "csv":
+        return pd.read_csv(
+            file_path,
+            header="infer",
+            dtype={
+                column_name: type_
+                for column_name, type_ in dtype.items()
+                if column_name != typedef.Columns.DATE
+            },
+            parse_dates=[typedef.Columns.DATE],
+        )
+
+    if format_ == "parquet":
+        df = pd.read_parquet(file_path)
+    else:
+        df = pd.read_feather(file_path)
+    # no-op unless the dataset was written with other dtypes
+    return df.astype(
+        {
+            column_name: type_
+            for column_name, type_ in dtype.items()
+            if column_name in df.columns and df[column_name].dtype != type_
+        }
+    )
@@ -0,0 +1,129 @@
+"""
+Dense daily time series, one row per location and one column per date.
+"""
+import datetime
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from covid19 import typedef
+
+DEFAULT_COLUMNS = (
+    typedef.Columns.CONFIRMED,
+    typedef.Columns.DEATHS,
+    typedef.Columns.RECOVERED,
+)
+
+
+class TimeSeriesStore:
+    """
+    Holds a locations x dates int64 array per count column.
+    Dates span every day from the first to the last report, and
+    `observed` marks the (location, date) cells that had a report.
+    """
+
+    def __init__(
+        self,
+        locations: pd.Index,
+        dates: pd.DatetimeIndex,
+        values: Dict[str, np.ndarray],
+        observed: np.ndarray,
+    ):
+        self.locations = locations
+        self.dates = dates
+        self.values = values
+        self.observed = observed
+        self._location_positions = {
+            location: position for position, location in enumerate(locations)
+        }
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, columns: Sequence[str] = DEFAULT_COLUMNS
+    ) -> "TimeSeriesStore":
+        """
+        Builds the store from a long-form frame with one row per location and date,
+        e.g. the region aggregate from `preproc.process_data_from_jhu`.
+        """
+        location_codes, locations = pd.factorize(
+            df[typedef.Columns.REGION], sort=True
+        )
+        dates = pd.to_datetime(df[typedef.Columns.DATE]).dt.normalize()
+        start = dates.min()
+        date_codes = ((dates - start) // pd.Timedelta(days=1)).to_numpy()
+        date_index = pd.date_range(start, dates.max(), freq="D")
+
+        shape = (len(locations), len(date_index))
+        observed = np.zeros(shape, dtype=bool)
+        observed[location_codes, date_codes] = True
+        values = {}
+        for column_name in columns:
+            array = np.zeros(shape, dtype=np.int64)
+            array[location_codes, date_codes] = df[column_name].to_numpy()
+            values[column_name] = array
+        return cls(pd.Index(np.asarray(locations)), date_index, values, observed)
+
+    @property
+    def shape(self):
+        return self.observed.shape
+
+    def location_position(self, location: str) -> int:
+        return self._location_positions[location]
+
+    def date_position(self, date: datetime.date) -> int:
+        position = (pd.Timestamp(date) - self.dates[0]).days
+        if position < 0 or position >= len(self.dates):
+            raise KeyError(date)
+        return position
+
+    def series(
+        self, location: str, column: str = typedef.Columns.CONFIRMED
+    ) -> np.ndarray:
+        # a view, no copy
+        return self.values[column][self.location_position(location)]
+
+    def frame(self, location: str) -> pd.DataFrame:
+        position = self.location_position(location)
+        df = pd.DataFrame(
+            {
+                column_name: array[position]
+                for column_name, array in self.values.items()
+            },
+        )
+        df.insert(0, typedef.Columns.DATE, self.dates)
+        return df[self.observed[position]].reset_index(drop=True)
+
+    def totals(self, column: str = typedef.Columns.CONFIRMED) -> np.ndarray:
+        return self.values[column].sum(axis=0)
+
+    def growth_rate(self, column: str = typedef.Columns.CONFIRMED) -> np.ndarray:
+        """
+        Day over day ratio of counts, for every location at once.
+        Undefined for the first date, and when the previous day
+        has no report or a zero count.
+        """
+        array = self.values[column].astype(float)
+        previous = np.full_like(array, np.nan)
+        previous[:, 1:] = np.where(self.observed[:, :-1], array[:, :-1], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(previous > 0, array / previous, np.nan)
+        rate[~self.observed] = np.nan
+        return np.round(rate, 3)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Long-form frame of the observed cells, sorted by location and date.
+        """
+        location_positions, date_positions = np.nonzero(self.observed)
+        df = pd.DataFrame(
+            {
+                typedef.Columns.REGION: pd.Categorical.from_codes(
+                    location_positions, categories=self.locations
+                ),
+                typedef.Columns.DATE: self.dates[date_positions],
+            }
+        )
+        for column_name, array in self.values.items():
+            df[column_name] = array[location_positions, date_positions]
+        return df
@@ -0,0 +1,135 @@
+"""
+Stage level instrumentation.
+Records wall time, cpu time, peak RSS and row counts of pipeline stages,
+while a recorder is active, e.g. `with instrument.recording() as recorder: ...`.
+Stages outside of one aren't recorded.
+"""
+import contextlib
+import dataclasses
+import functools
+import json
+import resource
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclasses.dataclass
+class StageRecord:
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    # peak RSS of this process, and of its finished child processes,
+    # as of the end of the stage
+    peak_rss_mb: float = 0.0
+    peak_rss_children_mb: float = 0.0
+    # growth of the peak RSS over the stage
+    peak_rss_increase_mb: float = 0.0
+    rows: Optional[int] = None
+
+
+class Recorder:
+    def __init__(self):
+        self.records: List[StageRecord] = []
+        self._stack: List[str] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[StageRecord]:
+        """
+        Records the enclosed block. Nested stages are named after their parents,
+        e.g. "pipeline/preproc". Set `rows` on the yielded record to report
+        the rows a stage produced.
+        """
+        self._stack.append(name)
+        record = StageRecord(name="/".join(self._stack), rows=rows)
+        start_rss = _peak_rss_mb(resource.RUSAGE_SELF)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - start_wall
+            record.cpu_time = time.process_time() - start_cpu
+            record.peak_rss_mb = _peak_rss_mb(resource.RUSAGE_SELF)
+            record.peak_rss_children_mb = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+            record.peak_rss_increase_mb = record.peak_rss_mb - start_rss
+            self._stack.pop()
+            self.records.append(record)
+
+    def report(self) -> Dict[str, Any]:
+        return {"stages": [dataclasses.asdict(record) for record in self.records]}
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def clear(self) -> None:
+        self.records = []
+
+
+# Recorder of `stage` and `instrumented`, set by `recording`.
+_ACTIVE_RECORDER: Optional[Recorder] = None
+
+
+@contextlib.contextmanager
+def recording(recorder: Optional[Recorder] = None) -> Iterator[Recorder]:
+    """
+    Records the stages of the enclosed block with `recorder`, or a new one.
+    """
+    global _ACTIVE_RECORDER
+    previous = _ACTIVE_RECORDER
+    _ACTIVE_RECORDER = recorder if recorder is not None else Recorder()
+    try:
+        yield _ACTIVE_RECORDER
+    finally:
+        _ACTIVE_RECORDER = previous
+
+
+def stage(name: str, rows: Optional[int] = None):
+    if _ACTIVE_RECORDER is None:
+        # a record nobody keeps, so callers can set rows either way
+        return contextlib.nullcontext(StageRecord(name=name, rows=rows))
+    return _ACTIVE_RECORDER.stage(name, rows=rows)
+
+
+def instrumented(name: Optional[str] = None) -> Callable:
+    """
+    Decorator recording each call of the function as a stage, while recording.
+    Rows are counted from the result, if it holds DataFrames.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE_RECORDER is None:
+                return fn(*args, **kwargs)
+            with stage(name or fn.__name__) as record:
+                result = fn(*args, **kwargs)
+                record.rows = count_rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def count_rows(value: Any) -> Optional[int]:
+    if _is_frame(value):
+        return len(value)
+    if isinstance(value, dict) and value and all(
+        _is_frame(element) for element in value.values()
+    ):
+        return sum(len(element) for element in value.values())
+    return None
+
+
+def _is_frame(value: Any) -> bool:
+    # duck typed, so instrumented modules don't have to import pandas
+    return hasattr(value, "columns") and hasattr(value, "shape")
+
+
+def _peak_rss_mb(who: int) -> float:
+    peak_rss = resource.getrusage(who).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak_rss / (1024 * 1024)
+    return peak_rss / 1024
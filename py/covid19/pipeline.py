@@ -0,0 +1,215 @@
+"""
+Runs the update job in a single process: preproc -> viz -> partials.
+Datasets and charts are handed over in memory, and
+each stage still writes its outputs to disk as before.
+"""
+import argparse
+import contextlib
+import cProfile
+import os.path
+from typing import Dict, Optional, Sequence
+import dataclasses
+
+import pandas as pd
+
+from covid19 import instrument
+from covid19.data import preproc
+from covid19.data import storage
+from covid19.viz import createviz
+from covid19.viz import partials
+
+STAGES = ("preproc", "viz", "partials")
+
+
+@dataclasses.dataclass(frozen=True)
+class Args:
+    input_path: Optional[str]
+    output_path: str
+    partials_path: Optional[str]
+    partial_files: Sequence[str]
+    stages: Sequence[str]
+    incremental: bool
+    cache_path: Optional[str]
+    workers: int
+    format: str
+    force: bool
+    data_url: Optional[str]
+    shard_locations: bool
+    report_path: Optional[str]
+    profile: Optional[str]
+
+
+def run(
+    output_path: str,
+    input_path: Optional[str] = None,
+    partials_path: Optional[str] = None,
+    partial_files: Sequence[str] = ("region-agg-chart.html", "world-agg-chart.html"),
+    stages: Sequence[str] = STAGES,
+    incremental: bool = False,
+    cache_path: Optional[str] = None,
+    workers: int = 1,
+    format_: str = "csv",
+    force: bool = False,
+    data_url: Optional[str] = None,
+    shard_locations: bool = False,
+) -> None:
+    """
+    Runs the selected `stages`. A stage whose predecessor was not selected
+    reads its inputs from disk, where that predecessor left them.
+    """
+    # checked up front, so a run doesn't fail after its first stages
+    if "preproc" in stages and input_path is None:
+        raise ValueError("The preproc stage needs an input path")
+    if "partials" in stages and partials_path is None:
+        raise ValueError("The partials stage needs a partials path")
+
+    charts_path = os.path.join(output_path, "charts")
+
+    datasets: Optional[Dict[str, pd.DataFrame]] = None
+    if "preproc" in stages:
+        with instrument.stage("preproc"):
+            datasets = preproc.filter_proc_data(
+                preproc.process_data_from_jhu(
+                    input_path,
+                    output_path,
+                    incremental=incremental,
+                    cache_path=cache_path,
+                    workers=workers,
+                    format_=format_,
+                )
+            )
+
+    htmls: Optional[Dict[str, str]] = None
+    if "viz" in stages:
+        with instrument.stage("viz"):
+            if datasets is None:
+                datasets = preproc.read_proc_data(output_path, format_)
+            htmls = createviz.create_charts(
+                charts_path,
+                datasets,
+                force=force,
+                data_url=data_url,
+                shard_locations=shard_locations,
+            )
+
+    if "partials" in stages:
+        with instrument.stage("partials"):
+            if htmls is None:
+                partials.generate_partials(
+                    charts_path, list(partial_files), partials_path
+                )
+            else:
+                partials.write_partials(
+                    {file_name: htmls[file_name] for file_name in partial_files},
+                    partials_path,
+                )
+
+
+def parse_args() -> Args:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--input-path", default=None, help="Path to csv files with CV19 data"
+    )
+    arg_parser.add_argument(
+        "--output-path", required=True, help="Dir to save processed data and charts"
+    )
+    arg_parser.add_argument(
+        "--partials-path", default=None, help="Path to output partials"
+    )
+    arg_parser.add_argument(
+        "--partial-files",
+        nargs="+",
+        default=["region-agg-chart.html", "world-agg-chart.html"],
+        help="Charts to generate partials for",
+    )
+    arg_parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES,
+        default=list(STAGES),
+        help="Stages to run",
+    )
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only parse daily reports that are new or changed since the last run",
+    )
+    arg_parser.add_argument(
+        "--cache-path",
+        default=None,
+        help="Dir for the incremental ingestion cache. Defaults to <output-path>/.cache",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse daily reports",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=storage.FORMATS,
+        default="csv",
+        help="File format of the processed data",
+    )
+    arg_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild all charts, even if their inputs did not change",
+    )
+    arg_parser.add_argument(
+        "--data-url",
+        default=None,
+        help="Load chart data from this URL, instead of inlining it in the charts",
+    )
+    arg_parser.add_argument(
+        "--shard-locations",
+        action="store_true",
+        help="Write region chart data as one file per location. Requires --data-url",
+    )
+    arg_parser.add_argument(
+        "--report-path",
+        default=None,
+        help="Path to save a json report with the time, memory and rows of each stage",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        default=None,
+        help="Path to save cProfile stats of the run, e.g. for snakeviz or pstats",
+    )
+    kwargs, _ = arg_parser.parse_known_args()
+    if "preproc" in kwargs.stages and kwargs.input_path is None:
+        arg_parser.error("the preproc stage requires --input-path")
+    if "partials" in kwargs.stages and kwargs.partials_path is None:
+        arg_parser.error("the partials stage requires --partials-path")
+    return Args(**vars(kwargs))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    # stages are only recorded for a report
+    recording = (
+        instrument.recording() if args.report_path else contextlib.nullcontext()
+    )
+    with recording as recorder:
+        run(
+            args.output_path,
+            input_path=args.input_path,
+            partials_path=args.partials_path,
+            partial_files=args.partial_files,
+            stages=args.stages,
+            incremental=args.incremental,
+            cache_path=args.cache_path,
+            workers=args.workers,
+            format_=args.format,
+            force=args.force,
+            data_url=args.data_url,
+            shard_locations=args.shard_locations,
+        )
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    if args.report_path:
+        recorder.save(args.report_path)
@@ -0,0 +1,261 @@
+"""
+Local HTTP service of the processed datasets, as JSON time series.
+Datasets are read once, and every response is serialized up front,
+so requests are answered with a lookup, and with
+a 304 when the client already holds the same ETag.
+
+Routes:
+  /locations          names of all locations
+  /locations/<name>   daily series of a location, e.g. /locations/Korea%2C%20South
+  /world              daily series of world totals
+  /dates              dates with reports
+  /dates/<yyyy-mm-dd> values of every location on a date
+"""
+import argparse
+import asyncio
+import dataclasses
+import hashlib
+import json
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from covid19 import typedef
+from covid19.data import preproc
+from covid19.data import storage
+
+SERIES_COLUMNS = (
+    typedef.Columns.DATE,
+    typedef.Columns.CONFIRMED,
+    typedef.Columns.GROWTH_RATE,
+    typedef.Columns.IMPUTED,
+)
+
+STATUS_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+# Longest request head we read, in bytes
+MAX_HEAD_SIZE = 16 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class Args:
+    data_path: str
+    format: str
+    host: str
+    port: int
+
+
+@dataclasses.dataclass(frozen=True)
+class Response:
+    status: int
+    body: bytes
+    etag: Optional[str] = None
+
+
+def json_response(body: str, status: int = 200) -> Response:
+    encoded = body.encode("UTF-8")
+    etag = '"%s"' % hashlib.sha256(encoded).hexdigest()[:32]
+    return Response(status, encoded, etag if status == 200 else None)
+
+
+def error_response(status: int) -> Response:
+    return json_response(json.dumps({"error": STATUS_REASONS[status]}), status)
+
+
+def render_records(df: pd.DataFrame) -> str:
+    df = df.copy()
+    for column_name in df.select_dtypes(include="datetime").columns:
+        df[column_name] = df[column_name].dt.strftime("%Y-%m-%d")
+    return df.to_json(orient="records")
+
+
+def build_responses(dfs: Dict[str, pd.DataFrame]) -> Dict[str, Response]:
+    """
+    Serialized responses of every route, keyed by path, from the
+    unfiltered datasets of `preproc.read_proc_data`.
+    """
+    df_region = dfs["region-agg-growth-rate"]
+    df_world = pd.merge(
+        dfs["world-agg-confirmed"],
+        dfs["world-agg-growth-rate"][
+            [typedef.Columns.DATE, typedef.Columns.GROWTH_RATE]
+        ],
+        on=typedef.Columns.DATE,
+        how="left",
+    )
+
+    responses = {}
+    locations: List[str] = []
+    # one groupby per index, rather than a filter per location or date
+    for location, df_location in df_region.groupby(
+        typedef.Columns.REGION, observed=True
+    ):
+        locations.append(location)
+        series = render_records(df_location[list(SERIES_COLUMNS)])
+        responses[f"/locations/{location}"] = json_response(
+            '{"location": %s, "series": %s}' % (json.dumps(location), series)
+        )
+    responses["/locations"] = json_response(json.dumps(sorted(locations)))
+
+    dates = []
+    for date, df_date in df_region.groupby(typedef.Columns.DATE):
+        date = pd.Timestamp(date).strftime("%Y-%m-%d")
+        dates.append(date)
+        values = render_records(
+            df_date[[typedef.Columns.REGION, *SERIES_COLUMNS[1:]]].astype(
+                {typedef.Columns.REGION: str}
+            )
+        )
+        responses[f"/dates/{date}"] = json_response(
+            '{"date": %s, "locations": %s}' % (json.dumps(date), values)
+        )
+    responses["/dates"] = json_response(json.dumps(dates))
+
+    responses["/world"] = json_response(
+        '{"series": %s}' % render_records(df_world[list(SERIES_COLUMNS)])
+    )
+    return responses
+
+
+def route(
+    responses: Dict[str, Response],
+    method: str,
+    target: str,
+    headers: Dict[str, str],
+) -> Response:
+    if method not in ("GET", "HEAD"):
+        return error_response(405)
+    path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+    response = responses.get(path.rstrip("/") or "/")
+    if response is None:
+        return error_response(404)
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None and response.etag in (
+        etag.strip() for etag in if_none_match.split(",")
+    ):
+        return Response(304, b"", response.etag)
+    return response
+
+
+def parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    method, target, version = request_line.split(" ")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def encode_response(response: Response, send_body: bool, keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {response.status} {STATUS_REASONS[response.status]}"]
+    if response.status != 304:
+        lines.extend(
+            [
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(response.body)}",
+            ]
+        )
+    lines.extend(
+        [
+            # clients revalidate with the ETag, which is cheap
+            "Cache-Control: no-cache",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+    )
+    if response.etag is not None:
+        lines.append(f"ETag: {response.etag}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head + response.body if send_body else head
+
+
+async def handle_connection(
+    responses: Dict[str, Response],
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    try:
+        keep_alive = True
+        while keep_alive:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+                method, target, version, headers = parse_head(head)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except (asyncio.LimitOverrunError, ValueError):
+                writer.write(encode_response(error_response(400), True, False))
+                break
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" or (
+                version == "HTTP/1.1" and connection != "close"
+            )
+            # bodies are never read, so the connection is closed rather than
+            # have their bytes taken for the head of the next request
+            if "transfer-encoding" in headers or headers.get(
+                "content-length", "0"
+            ) not in ("", "0"):
+                keep_alive = False
+            response = route(responses, method, target, headers)
+            writer.write(
+                encode_response(
+                    response,
+                    send_body=method != "HEAD" and response.status != 304,
+                    keep_alive=keep_alive,
+                )
+            )
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(responses: Dict[str, Response], host: str, port: int) -> None:
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(responses, reader, writer),
+        host,
+        port,
+        limit=MAX_HEAD_SIZE,
+    )
+    for socket in server.sockets:
+        print("Serving on http://%s:%s" % socket.getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+
+def main(
+    data_path: str, format_: str = "csv", host: str = "127.0.0.1", port: int = 8000
+):
+    dfs = preproc.read_proc_data(data_path, format_, filtered=False)
+    responses = build_responses(dfs)
+    asyncio.run(serve(responses, host, port))
+
+
+def parse_args() -> Args:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--data-path", required=True, help="Path to the processed data"
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=storage.FORMATS,
+        default="csv",
+        help="File format of the processed data",
+    )
+    arg_parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on"
+    )
+    arg_parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    kwargs, _ = arg_parser.parse_known_args()
+    return Args(**vars(kwargs))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.data_path, format_=args.format, host=args.host, port=args.port)
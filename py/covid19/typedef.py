@@ -3,17 +3,36 @@ from typing import Dict
 
 class Columns:
     REGION = "location"
+    PROVINCE = "province"
+    COUNTY = "county"
     CONFIRMED = "confirmed"
     DEATHS = "deaths"
     RECOVERED = "recovered"
     # created
     DATE = "date"
     GROWTH_RATE = "growth_rate"
+    # true for days without a report, filled in from the last one
+    IMPUTED = "imputed"
+    SCENARIO = "scenario"
+    MODEL = "model"
+    PROJECTED = "projected"
+    NEW_CASES = "new_cases"
+    NEW_CASES_AVG_7 = "new_cases_avg_7"
+    NEW_CASES_AVG_14 = "new_cases_avg_14"
+    GROWTH_FACTOR = "growth_factor"
+    DOUBLING_TIME = "doubling_time"
 
     @classmethod
     def name_mapping(cls) -> Dict[str, str]:
+        # JHU headers changed over time, e.g. "Country/Region"
+        # up to 2020-03-21 and "Country_Region" from 2020-03-22 on.
         return {
+            "Country/Region": cls.REGION,
             "Country_Region": cls.REGION,
+            "Province/State": cls.PROVINCE,
+            "Province_State": cls.PROVINCE,
+            # counties, only reported for the US
+            "Admin2": cls.COUNTY,
             "Confirmed": cls.CONFIRMED,
             "Deaths": cls.DEATHS,
             "Recovered": cls.RECOVERED,
@@ -23,8 +42,10 @@ class Columns:
     def type_mapping(cls) -> Dict[str, str]:
         return {
             cls.REGION: "category",
-            cls.CONFIRMED: "int64",
-            cls.DEATHS: "int64",
-            cls.RECOVERED: "int64",
+            cls.PROVINCE: "category",
+            cls.COUNTY: "category",
+            cls.CONFIRMED: "int32",
+            cls.DEATHS: "int32",
+            cls.RECOVERED: "int32",
             cls.DATE: "datetime64[ns]",
         }
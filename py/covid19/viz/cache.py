@@ -0,0 +1,82 @@
+"""
+Build cache for charts.
+A chart is only rebuilt when the hash of its inputs,
+parameters or builder code changed since the last build,
+or when its page or data files are missing.
+"""
+import hashlib
+import inspect
+import json
+import os
+import os.path
+from typing import Any, Callable, Dict, Mapping, Sequence
+
+import altair as alt
+import pandas as pd
+
+CACHE_FILE_NAME = ".build-cache.json"
+
+
+def fingerprint(
+    build_fn: Callable[..., Any],
+    dfs: Mapping[str, pd.DataFrame],
+    params: Mapping[str, Any],
+    dependencies: Sequence[Any] = (),
+) -> str:
+    """
+    Hash of a chart build. Code is hashed by the source of the whole module
+    of `build_fn`, so helpers it calls count too, and of `dependencies`,
+    e.g. modules of templates it fills in.
+    """
+    digest = hashlib.sha256()
+    header = {
+        "altair": alt.__version__,
+        "sources": [
+            inspect.getsource(source)
+            for source in (inspect.getmodule(build_fn), *dependencies)
+        ],
+        "params": params,
+        "schemas": {
+            name: [[str(column_name), str(dtype)] for column_name, dtype in df.dtypes.items()]
+            for name, df in dfs.items()
+        },
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode("UTF-8"))
+    for name in sorted(dfs):
+        digest.update(pd.util.hash_pandas_object(dfs[name], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class BuildCache:
+    def __init__(self, charts_path: str, entries: Dict[str, str]):
+        self.charts_path = charts_path
+        self.entries = entries
+
+    @classmethod
+    def load(cls, charts_path: str) -> "BuildCache":
+        cache_path = os.path.join(charts_path, CACHE_FILE_NAME)
+        if not os.path.exists(cache_path):
+            return cls(charts_path, {})
+        with open(cache_path) as file:
+            return cls(charts_path, json.load(file))
+
+    def save(self) -> None:
+        cache_path = os.path.join(self.charts_path, CACHE_FILE_NAME)
+        with open(f"{cache_path}.tmp", "w") as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+        os.replace(f"{cache_path}.tmp", cache_path)
+
+    def is_fresh(
+        self, file_name: str, key: str, data_files: Sequence[str] = ()
+    ) -> bool:
+        """
+        Whether `file_name` was built with `key`, and it and
+        the `data_files` it loads, relative to the charts path, still exist.
+        """
+        return self.entries.get(file_name) == key and all(
+            os.path.exists(os.path.join(self.charts_path, path))
+            for path in (file_name, *data_files)
+        )
+
+    def update(self, file_name: str, key: str) -> None:
+        self.entries[file_name] = key
@@ -1,68 +1,91 @@
 import argparse
 import copy
+import json
 import os.path
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional, Sequence
 import dataclasses
 
 import altair as alt
 import datetime
 import pandas as pd
 
+from covid19 import instrument
 from covid19 import typedef
 from covid19.data import preproc
 from covid19.data import generate
+from covid19.data import storage
+from covid19.viz import cache
+from covid19.viz import templates
 
 
 @dataclasses.dataclass(frozen=True)
 class Args:
     data_path: str
+    format: str
+    force: bool
+    data_url: Optional[str]
+    shard_locations: bool
 
 
-def create_viz_growth_simulation(charts_path: str) -> None:
-    start_date = datetime.date(2020, 1, 1)
-    end_date = datetime.date(2020, 1, 15)
+DATA_DIR = "data"
 
-    df_sim_a = generate.generate_infection_projection_data(
-        start_date, end_date, starting_cases=5, growth_rate=2.5
-    )
-    df_sim_b = generate.generate_infection_projection_data(
-        start_date, end_date, starting_cases=5, growth_rate=2.0
-    )
-    df_sim_c = generate.generate_infection_projection_data(
-        start_date, end_date, starting_cases=5, growth_rate=1.5
+
+def chart_data(
+    charts_path: str, df: pd.DataFrame, name: str, data_url: Optional[str]
+) -> Any:
+    """
+    Returns `df` to inline it in the chart spec, or, if `data_url` is set,
+    writes it to the charts data dir and returns a reference to `data_url`/`name`.json.
+    """
+    if data_url is None:
+        return df
+
+    data_path = os.path.join(charts_path, DATA_DIR)
+    if not os.path.exists(data_path):
+        os.makedirs(data_path)
+    write_chart_data(df, os.path.join(data_path, f"{name}.json"))
+    return alt.UrlData(
+        url=f"{data_url.rstrip('/')}/{name}.json",
+        format=alt.DataFormat(type="json", parse={typedef.Columns.DATE: "date"}),
     )
 
-    viz_path = os.path.join(charts_path, "virality-simulation.html")
 
-    agg_count_chart_a = (
-        alt.Chart(df_sim_a)
-        .mark_line(point=True, color="red")
-        .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.CONFIRMED, title="# Cases"),
-            color=alt.Color("%s:N" % typedef.Columns.GROWTH_RATE, title="Growth Rate"),
-            tooltip="%s:N" % typedef.Columns.CONFIRMED,
-        )
-        .interactive()
-        .properties(width=600, height=400)
-    )
+def write_chart_data(df: pd.DataFrame, file_path: str) -> None:
+    df = df.copy()
+    for column_name in df.select_dtypes(include="datetime").columns:
+        # no time zone, so browsers read it as local time, like inlined data
+        df[column_name] = df[column_name].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    df.to_json(file_path, orient="records")
 
-    agg_count_chart_b = (
-        alt.Chart(df_sim_b)
-        .mark_line(point=True, color="red")
-        .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.CONFIRMED, title="# Cases"),
-            color=alt.Color("%s:N" % typedef.Columns.GROWTH_RATE, title="Growth Rate"),
-            tooltip="%s:N" % typedef.Columns.CONFIRMED,
-        )
-        .interactive()
-        .properties(width=600, height=400)
+
+def save_chart(chart: Any, viz_path: str) -> str:
+    html = chart.to_html(embed_options={"renderer": "svg"})
+    with open(viz_path, "w") as file:
+        file.write(html)
+    return html
+
+
+def location_slug(location: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", location.lower()).strip("-")
+
+
+def create_viz_growth_simulation(
+    charts_path: str, growth_rates: Sequence[float] = (2.5, 2.0, 1.5)
+) -> str:
+    start_date = datetime.date(2020, 1, 1)
+    end_date = datetime.date(2020, 1, 15)
+
+    # One frame holds every scenario, drawn as a line per growth rate
+    df_sim = generate.generate_infection_projections(
+        start_date, end_date, starting_cases=5, growth_rates=growth_rates
     )
 
-    agg_count_chart_c = (
-        alt.Chart(df_sim_c)
-        .mark_line(point=True, color="red")
+    viz_path = os.path.join(charts_path, "virality-simulation.html")
+
+    agg_count_chart = (
+        alt.Chart(df_sim)
+        .mark_line(point=True)
         .encode(
             alt.X(typedef.Columns.DATE, title="Date"),
             alt.Y(typedef.Columns.CONFIRMED, title="# Cases"),
@@ -73,46 +96,48 @@ def create_viz_growth_simulation(charts_path: str) -> None:
         .properties(width=600, height=400)
     )
 
-    agg_count_chart_a.configure(numberFormat="~s")
-    agg_count_chart_a.configure_legend(
-        strokeColor="gray",
-        fillColor="#EEEEEE",
-        padding=10,
-        cornerRadius=10,
-        orient="top-right",
-    )
-
-    final_chart = agg_count_chart_a + agg_count_chart_b + agg_count_chart_c
-    final_chart.properties(title="Exponential Growth").save(
-        viz_path, embed_options={"renderer": "svg"}
-    )
+    return save_chart(agg_count_chart.properties(title="Exponential Growth"), viz_path)
 
 
 def create_viz_world_confirmed_and_rate(
-    charts_path: str, dfs: Dict[str, pd.DataFrame]
-) -> None:
-    df_world_agg_confirmed = dfs["world-agg-confirmed"]
-    df_world_agg_growth_rate = dfs["world-agg-growth-rate"]
+    charts_path: str, dfs: Dict[str, pd.DataFrame], data_url: Optional[str] = None
+) -> str:
+    # Both views read from a single dataset
+    data_world_agg = chart_data(
+        charts_path,
+        pd.merge(
+            dfs["world-agg-confirmed"][
+                [typedef.Columns.DATE, typedef.Columns.CONFIRMED]
+            ],
+            dfs["world-agg-growth-rate"][
+                [typedef.Columns.DATE, typedef.Columns.GROWTH_RATE]
+            ],
+            on=typedef.Columns.DATE,
+            how="outer",
+        ),
+        "world-agg",
+        data_url,
+    )
 
     viz_path = os.path.join(charts_path, "world-agg-chart.html")
 
     world_agg_confirmed_chart = (
-        alt.Chart(df_world_agg_confirmed)
+        alt.Chart(data_world_agg)
         .mark_line(point=True, color="red")
         .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.CONFIRMED, title="# Cases"),
-            tooltip=typedef.Columns.CONFIRMED,
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.CONFIRMED, title="# Cases"),
+            tooltip="%s:Q" % typedef.Columns.CONFIRMED,
         )
         .properties(width=600, height=400)
     ).properties(title="Global # Confirmed Cases")
 
     world_agg_growth_rate_chart = (
-        alt.Chart(df_world_agg_growth_rate)
+        alt.Chart(data_world_agg)
         .mark_line(point=True, color="red")
         .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.GROWTH_RATE, title="Rate of New Cases"),
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.GROWTH_RATE, title="Rate of New Cases"),
             tooltip="%s:N" % typedef.Columns.GROWTH_RATE,
         )
         .properties(width=600, height=120, title="Global Rate of New Cases")
@@ -127,24 +152,25 @@ def create_viz_world_confirmed_and_rate(
         orient="top-right",
     )
 
-    alt.vconcat(
+    chart = alt.vconcat(
         add_ruler_as_selector_on_single_line_chart(
             world_agg_confirmed_chart,
-            df_world_agg_confirmed,
-            x_field=typedef.Columns.DATE,
-            y_field=typedef.Columns.CONFIRMED,
+            data_world_agg,
+            x_field="%s:T" % typedef.Columns.DATE,
+            y_field="%s:Q" % typedef.Columns.CONFIRMED,
         ),
         add_ruler_as_selector_on_single_line_chart(
             world_agg_growth_rate_chart,
-            df_world_agg_growth_rate,
-            x_field=typedef.Columns.DATE,
-            y_field=typedef.Columns.GROWTH_RATE,
+            data_world_agg,
+            x_field="%s:T" % typedef.Columns.DATE,
+            y_field="%s:Q" % typedef.Columns.GROWTH_RATE,
         ),
-    ).save(viz_path, embed_options={"renderer": "svg"})
+    )
+    return save_chart(chart, viz_path)
 
 
 def add_ruler_as_selector_on_single_line_chart(
-    chart: Any, df: pd.DataFrame, x_field: str, y_field: str
+    chart: Any, data: Any, x_field: str, y_field: str
 ) -> Any:
     # Create a selection that chooses the nearest point & selects based on x-value
     nearest = alt.selection_point(
@@ -156,7 +182,7 @@ def add_ruler_as_selector_on_single_line_chart(
     # Transparent selectors across the chart. This is what tells us
     # the x-value of the cursor
     selectors = (
-        alt.Chart(df)
+        alt.Chart(data)
         .mark_point()
         .encode(x=x_field, opacity=alt.value(0), tooltip=alt.Tooltip(y_field),)
         .add_params(nearest)
@@ -174,7 +200,7 @@ def add_ruler_as_selector_on_single_line_chart(
 
     # Draw a rule at the location of the selection
     rules = (
-        alt.Chart(df)
+        alt.Chart(data)
         .mark_rule(color="gray")
         .encode(x=x_field)
         .transform_filter(nearest)
@@ -185,10 +211,24 @@ def add_ruler_as_selector_on_single_line_chart(
 
 
 def create_viz_region_confirmed_and_rate(
-    charts_path: str, dfs: Dict[str, pd.DataFrame]
-) -> None:
+    charts_path: str, dfs: Dict[str, pd.DataFrame], data_url: Optional[str] = None
+) -> str:
     df_region_agg_confirmed = dfs["region-agg-confirmed"]
-    df_region_agg_growth_rate = dfs["region-agg-growth-rate"]
+    # The growth rate dataset has the confirmed counts too,
+    # so both views read from it.
+    data_region_agg = chart_data(
+        charts_path,
+        dfs["region-agg-growth-rate"][
+            [
+                typedef.Columns.REGION,
+                typedef.Columns.DATE,
+                typedef.Columns.CONFIRMED,
+                typedef.Columns.GROWTH_RATE,
+            ]
+        ],
+        "region-agg",
+        data_url,
+    )
 
     viz_path = os.path.join(charts_path, "region-agg-chart.html")
 
@@ -207,34 +247,131 @@ def create_viz_region_confirmed_and_rate(
     )
 
     region_agg_confirmed_chart = (
-        alt.Chart(df_region_agg_confirmed)
+        alt.Chart(data_region_agg)
         .mark_line(point=True)
         .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.CONFIRMED, title="# New Cases"),
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.CONFIRMED, title="# New Cases"),
             color=color,
-            tooltip=typedef.Columns.CONFIRMED,
+            tooltip="%s:Q" % typedef.Columns.CONFIRMED,
         )
         .add_params(single_selector)
         .transform_filter(single_selector)
     )
 
     region_agg_growth_rate_chart = (
-        alt.Chart(df_region_agg_growth_rate)
+        alt.Chart(data_region_agg)
         .mark_line(point=True)
         .encode(
-            alt.X(typedef.Columns.DATE, title="Date"),
-            alt.Y(typedef.Columns.GROWTH_RATE, title="Rate of New Cases"),
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.GROWTH_RATE, title="Rate of New Cases"),
             color=color,
-            tooltip=typedef.Columns.GROWTH_RATE,
+            tooltip="%s:Q" % typedef.Columns.GROWTH_RATE,
         )
         .add_params(single_selector)
         .transform_filter(single_selector)
     )
 
-    alt.vconcat(region_agg_confirmed_chart, region_agg_growth_rate_chart).save(
-        viz_path, embed_options={"renderer": "svg"}
+    return save_chart(
+        alt.vconcat(region_agg_confirmed_chart, region_agg_growth_rate_chart), viz_path
+    )
+
+
+def sharded_data_files(charts_path: str) -> List[str]:
+    """
+    Data files of the sharded region charts, relative to `charts_path`:
+    the index, and the shards it lists, if it exists.
+    """
+    index_path = os.path.join(DATA_DIR, "region", "index.json")
+    if not os.path.exists(os.path.join(charts_path, index_path)):
+        return [index_path]
+    with open(os.path.join(charts_path, index_path)) as file:
+        index = json.load(file)
+    return [
+        index_path,
+        *(os.path.join(DATA_DIR, "region", entry["file"]) for entry in index),
+    ]
+
+
+def create_viz_region_confirmed_and_rate_sharded(
+    charts_path: str, dfs: Dict[str, pd.DataFrame], data_url: Optional[str] = None
+) -> str:
+    """
+    Same charts as `create_viz_region_confirmed_and_rate`, but each location's
+    data is written to its own shard, listed in an index. The page only
+    loads the shard of the location picked in the dropdown.
+    """
+    if data_url is None:
+        raise ValueError("Sharded region charts need a data url")
+
+    df_region_agg = dfs["region-agg-growth-rate"]
+    shards_path = os.path.join(charts_path, DATA_DIR, "region")
+    if not os.path.exists(shards_path):
+        os.makedirs(shards_path)
+
+    index, slugs = [], set()
+    # by name, whatever the order of the categories
+    for location, df_location in sorted(
+        df_region_agg.groupby(typedef.Columns.REGION, observed=True),
+        key=lambda group: group[0],
+    ):
+        slug = location_slug(location) or "location"
+        while slug in slugs:
+            slug = f"{slug}-"
+        slugs.add(slug)
+        write_chart_data(
+            df_location[
+                [
+                    typedef.Columns.DATE,
+                    typedef.Columns.CONFIRMED,
+                    typedef.Columns.GROWTH_RATE,
+                ]
+            ],
+            os.path.join(shards_path, f"{slug}.json"),
+        )
+        index.append({"location": location, "file": f"{slug}.json"})
+    with open(os.path.join(shards_path, "index.json"), "w") as file:
+        json.dump(index, file)
+
+    data_name = "region-agg"
+    region_agg_confirmed_chart = (
+        alt.Chart(alt.NamedData(name=data_name))
+        .mark_line(point=True)
+        .encode(
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.CONFIRMED, title="# New Cases"),
+            tooltip="%s:Q" % typedef.Columns.CONFIRMED,
+        )
+    )
+    region_agg_growth_rate_chart = (
+        alt.Chart(alt.NamedData(name=data_name))
+        .mark_line(point=True)
+        .encode(
+            alt.X("%s:T" % typedef.Columns.DATE, title="Date"),
+            alt.Y("%s:Q" % typedef.Columns.GROWTH_RATE, title="Rate of New Cases"),
+            tooltip="%s:Q" % typedef.Columns.GROWTH_RATE,
+        )
+    )
+    spec = alt.vconcat(
+        region_agg_confirmed_chart, region_agg_growth_rate_chart
+    ).to_dict()
+
+    html = templates.SHARDED_CHART_TEMPLATE.substitute(
+        output_div="vis",
+        base_url="https://cdn.jsdelivr.net/npm",
+        vega_version=alt.VEGA_VERSION,
+        vegalite_version=alt.VEGALITE_VERSION,
+        vegaembed_version=alt.VEGAEMBED_VERSION,
+        spec=json.dumps(spec),
+        embed_options=json.dumps({"renderer": "svg", "mode": "vega-lite"}),
+        data_name=json.dumps(data_name),
+        date_field=json.dumps(typedef.Columns.DATE),
+        index_url=json.dumps(f"{data_url.rstrip('/')}/region/index.json"),
     )
+    viz_path = os.path.join(charts_path, "region-agg-chart.html")
+    with open(viz_path, "w") as file:
+        file.write(html)
+    return html
 
 
 def add_ruler_to_multi_line_chart(
@@ -284,23 +421,133 @@ def parse_args() -> Args:
     arg_parser.add_argument(
         "--data-path", required=True, help="Dir with processed data"
     )
+    arg_parser.add_argument(
+        "--format",
+        choices=storage.FORMATS,
+        default="csv",
+        help="File format of the processed data",
+    )
+    arg_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild all charts, even if their inputs did not change",
+    )
+    arg_parser.add_argument(
+        "--data-url",
+        default=None,
+        help="Write chart data to <data-path>/charts/data and load it from this URL,"
+        " instead of inlining it in the charts",
+    )
+    arg_parser.add_argument(
+        "--shard-locations",
+        action="store_true",
+        help="Write region chart data as one file per location, loaded on demand."
+        " Requires --data-url",
+    )
     kwargs, _ = arg_parser.parse_known_args()
     return Args(**vars(kwargs))
 
 
-def main(data_path: str):
-    charts_path = os.path.join(data_path, "charts")
+@instrument.instrumented()
+def create_charts(
+    charts_path: str,
+    dfs: Dict[str, pd.DataFrame],
+    force: bool = False,
+    data_url: Optional[str] = None,
+    shard_locations: bool = False,
+) -> Dict[str, str]:
+    """
+    Builds the charts from the (date filtered) processed datasets into `charts_path`.
+    Returns the html of each chart, keyed by file name.
+    """
     if not os.path.exists(charts_path):
         os.makedirs(charts_path)
-    dfs = preproc.read_proc_data(data_path)
-    create_viz_growth_simulation(charts_path)
-    create_viz_world_confirmed_and_rate(charts_path, dfs)
-    create_viz_region_confirmed_and_rate(charts_path, dfs)
+
+    def data_files(*names: str) -> List[str]:
+        if data_url is None:
+            return []
+        return [os.path.join(DATA_DIR, f"{name}.json") for name in names]
+
+    # file name, builder, datasets, data files, modules the builder depends on
+    charts = (
+        (
+            "virality-simulation.html",
+            create_viz_growth_simulation,
+            (),
+            [],
+            (generate,),
+        ),
+        (
+            "world-agg-chart.html",
+            create_viz_world_confirmed_and_rate,
+            ("world-agg-confirmed", "world-agg-growth-rate"),
+            data_files("world-agg"),
+            (templates,),
+        ),
+        (
+            "region-agg-chart.html",
+            create_viz_region_confirmed_and_rate_sharded
+            if shard_locations
+            else create_viz_region_confirmed_and_rate,
+            ("region-agg-confirmed", "region-agg-growth-rate"),
+            sharded_data_files(charts_path)
+            if shard_locations
+            else data_files("region-agg"),
+            (templates,),
+        ),
+    )
+    htmls = {}
+    build_cache = cache.BuildCache.load(charts_path)
+    for file_name, viz_fn, dataset_names, chart_data_files, dependencies in charts:
+        chart_dfs = {name: dfs[name] for name in dataset_names}
+        key = cache.fingerprint(
+            viz_fn,
+            chart_dfs,
+            params={
+                "file_name": file_name,
+                "builder": viz_fn.__qualname__,
+                "data_url": data_url,
+            },
+            dependencies=dependencies,
+        )
+        if not force and build_cache.is_fresh(file_name, key, chart_data_files):
+            with open(os.path.join(charts_path, file_name)) as file:
+                htmls[file_name] = file.read()
+            continue
+        with instrument.stage(file_name):
+            if chart_dfs:
+                htmls[file_name] = viz_fn(charts_path, chart_dfs, data_url=data_url)
+            else:
+                htmls[file_name] = viz_fn(charts_path)
+        build_cache.update(file_name, key)
+    build_cache.save()
+    return htmls
+
+
+def main(
+    data_path: str,
+    format_: str = "csv",
+    force: bool = False,
+    data_url: Optional[str] = None,
+    shard_locations: bool = False,
+):
+    charts_path = os.path.join(data_path, "charts")
+    dfs = preproc.read_proc_data(data_path, format_)
+    create_charts(
+        charts_path,
+        dfs,
+        force=force,
+        data_url=data_url,
+        shard_locations=shard_locations,
+    )
 
 
 if __name__ == "__main__":
-    # args = parse_args()
+    args = parse_args()
     main(
-        # args.data_path
-        "/Users/guilherme/code/covid19/data/jhu/processed"
-        )
+        args.data_path,
+        args.format,
+        force=args.force,
+        data_url=args.data_url,
+        shard_locations=args.shard_locations,
+    )
@@ -5,11 +5,14 @@ Generates partials with visualizations.
 import argparse
 import os
 import os.path
-from typing import List, Sequence
+import re
+from typing import Dict, Iterable, Iterator, List, Sequence
 import dataclasses
 
-import scrapy
-import scrapy.http
+from covid19 import instrument
+
+BODY_START = re.compile(r"<body[^>]*>", re.IGNORECASE)
+BODY_END = re.compile(r"</body\s*>", re.IGNORECASE)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -32,20 +35,51 @@ def parse_args() -> Args:
     return Args(**vars(kwargs))
 
 
-def remove_tags(content: str, tag: str) -> str:
-    return content.lstrip(f"<{tag}>").rstrip(f"</{tag}>").strip()
+def iter_body(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yields the content of the <body> element, line by line, as laid out by
+    altair's html templates, i.e. with the body tags outside any script.
+    Stops reading at the closing tag.
+    """
+    lines = iter(lines)
+    for line in lines:
+        start = BODY_START.search(line)
+        if start is not None:
+            line = line[start.end() :]
+            break
+    else:
+        return
+
+    while True:
+        end = BODY_END.search(line)
+        if end is not None:
+            yield line[: end.start()]
+            return
+        yield line
+        line = next(lines, None)
+        if line is None:
+            return
+
+
+@instrument.instrumented()
+def write_partials(htmls: Dict[str, str], output_path: str) -> None:
+    """
+    Same as `generate_partials`, for charts already in memory, keyed by file name.
+    """
+    for file_name, html in htmls.items():
+        body = "".join(iter_body(html.splitlines(keepends=True))).strip()
+        with open(os.path.join(output_path, file_name), "w") as file:
+            file.write(body)
 
 
+@instrument.instrumented()
 def generate_partials(plots_path: str, files: List[str], output_path: str) -> None:
     for file_name in files:
         file_path = os.path.join(plots_path, file_name)
         output_file_name = os.path.join(output_path, file_name)
 
         with open(file_path) as file:
-            response = scrapy.http.HtmlResponse(
-                url=file_path, body=file.read().encode("UTF-8")
-            )
-            body = remove_tags(response.selector.xpath("//body").get(), "body")
+            body = "".join(iter_body(file)).strip()
 
         with open(output_file_name, "w") as file:
             file.write(body)
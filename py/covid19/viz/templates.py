@@ -0,0 +1,85 @@
+"""
+HTML templates for charts that altair's own templates don't cover.
+They follow the layout of altair's standard template,
+so partials can be extracted from them the same way.
+"""
+import string
+
+# Chart whose named dataset is filled with one location's shard at a time.
+# Shards are fetched when picked in the dropdown, and kept for later picks.
+SHARDED_CHART_TEMPLATE = string.Template(
+    """<!DOCTYPE html>
+<html>
+<head>
+  <style>
+    #${output_div}.vega-embed {
+      width: 100%;
+      display: flex;
+    }
+
+    #${output_div}.vega-embed details,
+    #${output_div}.vega-embed details summary {
+      position: relative;
+    }
+  </style>
+  <script type="text/javascript" src="${base_url}/vega@${vega_version}"></script>
+  <script type="text/javascript" src="${base_url}/vega-lite@${vegalite_version}"></script>
+  <script type="text/javascript" src="${base_url}/vega-embed@${vegaembed_version}"></script>
+</head>
+<body>
+  <label for="${output_div}-selector">Location</label>
+  <select id="${output_div}-selector"></select>
+  <div id="${output_div}"></div>
+  <script>
+    (function(vegaEmbed, vega) {
+      var spec = ${spec};
+      var embedOpt = ${embed_options};
+      var dataName = ${data_name};
+      var dateField = ${date_field};
+      var indexUrl = ${index_url};
+      var shards = {};
+
+      function showError(el, error){
+          el.innerHTML = ('<div style="color:red;">'
+                          + '<p>JavaScript Error: ' + error.message + '</p>'
+                          + '</div>');
+          throw error;
+      }
+
+      function fetchShard(url) {
+        if (!(url in shards)) {
+          shards[url] = fetch(url)
+            .then(response => response.json())
+            .then(rows => rows.map(row => Object.assign(row, {[dateField]: new Date(row[dateField])})));
+        }
+        return shards[url];
+      }
+
+      const el = document.getElementById('${output_div}');
+      const selector = document.getElementById('${output_div}-selector');
+      Promise.all([
+        vegaEmbed("#${output_div}", spec, embedOpt),
+        fetch(indexUrl).then(response => response.json()),
+      ]).then(([result, index]) => {
+        function show(url) {
+          return fetchShard(url).then(rows => result.view.change(
+            dataName, vega.changeset().remove(vega.truthy).insert(rows)
+          ).runAsync());
+        }
+        index.forEach(entry => {
+          const option = document.createElement("option");
+          option.value = new URL(entry.file, new URL(indexUrl, document.baseURI)).href;
+          option.text = entry.location;
+          selector.appendChild(option);
+        });
+        selector.addEventListener("change", () => show(selector.value).catch(error => showError(el, error)));
+        if (index.length > 0) {
+          return show(selector.value);
+        }
+      }).catch(error => showError(el, error));
+    })(vegaEmbed, vega);
+
+  </script>
+</body>
+</html>"""
+)
@@ -0,0 +1,94 @@
+import os.path
+import pickle
+
+import pandas as pd
+import pytest
+
+from covid19 import typedef
+from covid19.data import generate
+from covid19.data import ingest
+from covid19.data import preproc
+
+SCALE = generate.SyntheticScale(days=12, countries=4, provinces=2, counties=2)
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = os.path.join(tmp_path, "reports")
+    generate.generate_jhu_daily_reports(path, SCALE)
+    return path
+
+
+def world_totals(df: pd.DataFrame) -> pd.Series:
+    return df.groupby(typedef.Columns.DATE)[typedef.Columns.CONFIRMED].sum()
+
+
+def test_incremental_join_matches_full_join(input_path, tmp_path):
+    cache_path = os.path.join(tmp_path, "cache")
+    expected = world_totals(preproc.join_jhu_logs(input_path, aggregate=True))
+
+    for _ in range(2):
+        df = preproc.join_jhu_logs_incremental(input_path, cache_path)
+        pd.testing.assert_series_equal(world_totals(df), expected)
+
+
+def test_snapshot_of_another_version_is_rebuilt(input_path, tmp_path):
+    cache_path = os.path.join(tmp_path, "cache")
+    expected = world_totals(preproc.join_jhu_logs_incremental(input_path, cache_path))
+
+    snapshot_path = os.path.join(cache_path, ingest.SNAPSHOT_FILE_NAME)
+    with open(snapshot_path, "rb") as file:
+        content = pickle.load(file)
+    content["version"] = ingest.SNAPSHOT_VERSION - 1
+    with open(snapshot_path, "wb") as file:
+        pickle.dump(content, file)
+
+    df = preproc.join_jhu_logs_incremental(input_path, cache_path)
+    pd.testing.assert_series_equal(world_totals(df), expected)
+    assert ingest.load_snapshot(cache_path) is not None
+
+
+def test_snapshot_without_manifest_is_rebuilt(input_path, tmp_path):
+    # snapshots of older versions held the rows alone
+    cache_path = os.path.join(tmp_path, "cache")
+    df_full = preproc.join_jhu_logs(input_path, aggregate=True)
+    os.makedirs(cache_path)
+    df_full.to_pickle(os.path.join(cache_path, ingest.SNAPSHOT_FILE_NAME))
+
+    df = preproc.join_jhu_logs_incremental(input_path, cache_path)
+    pd.testing.assert_series_equal(world_totals(df), world_totals(df_full))
+
+
+def test_changed_report_replaces_its_rows(input_path, tmp_path):
+    cache_path = os.path.join(tmp_path, "cache")
+    preproc.join_jhu_logs_incremental(input_path, cache_path)
+
+    file_path = sorted(preproc.get_jhu_files(input_path))[0]
+    df_report = pd.read_csv(file_path, encoding="utf-8-sig")
+    df_report["Confirmed"] = df_report["Confirmed"] + 1
+    df_report.to_csv(file_path, index=False)
+
+    df = preproc.join_jhu_logs_incremental(input_path, cache_path)
+    expected = world_totals(preproc.join_jhu_logs(input_path, aggregate=True))
+    pd.testing.assert_series_equal(world_totals(df), expected)
+
+
+def test_touched_reports_are_hashed_once(input_path, tmp_path, monkeypatch):
+    # e.g. after a fresh clone, files get new mtimes but keep their content
+    cache_path = os.path.join(tmp_path, "cache")
+    preproc.join_jhu_logs_incremental(input_path, cache_path)
+    for file_path in preproc.get_jhu_files(input_path):
+        stat = os.stat(file_path)
+        os.utime(file_path, (stat.st_atime, stat.st_mtime + 60))
+    preproc.join_jhu_logs_incremental(input_path, cache_path)
+
+    digested = []
+    compute_digest = ingest.compute_digest
+
+    def counting_compute_digest(file_path):
+        digested.append(file_path)
+        return compute_digest(file_path)
+
+    monkeypatch.setattr(ingest, "compute_digest", counting_compute_digest)
+    preproc.join_jhu_logs_incremental(input_path, cache_path)
+    assert digested == []
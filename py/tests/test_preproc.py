@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from covid19 import typedef
+from covid19.data import metrics
+from covid19.data import preproc
+
+
+def region_frame(rows) -> pd.DataFrame:
+    columns = [typedef.Columns.REGION, typedef.Columns.DATE, typedef.Columns.CONFIRMED]
+    df = pd.DataFrame(rows, columns=columns)
+    return df.astype(
+        {
+            typedef.Columns.REGION: "category",
+            typedef.Columns.DATE: "datetime64[ns]",
+            typedef.Columns.CONFIRMED: "int64",
+        }
+    )
+
+
+def test_missing_day_has_no_growth_rate():
+    df = region_frame(
+        [
+            ("Italy", "2020-03-01", 100),
+            ("Italy", "2020-03-02", 110),
+            ("Italy", "2020-03-04", 150),
+            ("Italy", "2020-03-05", 165),
+        ]
+    )
+    df = preproc.generate_regional_growth_rate_metrics(df)
+
+    assert df[typedef.Columns.DATE].dt.day.tolist() == [1, 2, 3, 4, 5]
+    assert df[typedef.Columns.CONFIRMED].tolist() == [100, 110, 110, 150, 165]
+    assert df[typedef.Columns.IMPUTED].tolist() == [False, False, True, False, False]
+    np.testing.assert_array_equal(
+        df[typedef.Columns.GROWTH_RATE].to_numpy(), [np.nan, 1.1, np.nan, np.nan, 1.1]
+    )
+
+
+def test_world_totals_carry_over_absent_locations():
+    df = region_frame(
+        [
+            ("Italy", "2020-03-01", 100),
+            ("Italy", "2020-03-02", 110),
+            ("Italy", "2020-03-03", 120),
+            ("Spain", "2020-03-01", 50),
+            # Spain is missing from the report of 2020-03-02
+            ("Spain", "2020-03-03", 70),
+        ]
+    )
+    df_world = preproc.aggregate_world(
+        preproc.generate_regional_growth_rate_metrics(df)
+    )
+
+    assert df_world[typedef.Columns.CONFIRMED].tolist() == [150, 160, 190]
+    # a date is only imputed when no location reported on it
+    assert not df_world[typedef.Columns.IMPUTED].any()
+    df_world_metrics = metrics.generate_metrics(df)["world-metrics"]
+    assert (
+        df_world_metrics[typedef.Columns.CONFIRMED].tolist()
+        == df_world[typedef.Columns.CONFIRMED].tolist()
+    )
+
+
+def test_entries_start_at_first_report_of_each_location():
+    df = region_frame(
+        [
+            ("Italy", "2020-03-01", 100),
+            ("Italy", "2020-03-03", 120),
+            ("Spain", "2020-03-02", 50),
+        ]
+    )
+    df = preproc.generate_entries_spanning_period(df)
+
+    dates = df.groupby(typedef.Columns.REGION, observed=True)[typedef.Columns.DATE]
+    assert dates.min().dt.day.to_dict() == {"Italy": 1, "Spain": 2}
+    # every location spans up to the last report
+    assert dates.max().dt.day.to_dict() == {"Italy": 3, "Spain": 3}
+    assert len(df) == 5
@@ -16,17 +16,18 @@ function run(){
       git clone git@github.com:CSSEGISandData/COVID-19.git $BASEDIR/data/jhu
     fi;
 
-    python -m covid19.data.preproc \
+    python -m covid19.pipeline \
       --input-path=/Users/guilherme/code/covid19/data/jhu/csse_covid_19_data/csse_covid_19_daily_reports/ \
-      --output-path=/Users/guilherme/code/covid19/data/jhu/processed
-
-    python -m covid19.viz.createviz \
-      --data-path=/Users/guilherme/code/covid19/data/jhu/processed
-
-    python -m covid19.viz.partials \
-      --plots-path=/Users/guilherme/code/covid19/data/jhu/processed/charts \
-      --output-path=/Users/guilherme/code/covid19/docs/_partials \
-      --files region-agg-chart.html world-agg-chart.html
+      --output-path=/Users/guilherme/code/covid19/data/jhu/processed \
+      --partials-path=/Users/guilherme/code/covid19/docs/_partials \
+      --partial-files region-agg-chart.html world-agg-chart.html \
+      --incremental \
+      --format=parquet \
+      --data-url=data \
+      --shard-locations
+
+    mkdir -p /Users/guilherme/code/covid19/docs/data
+    cp -R /Users/guilherme/code/covid19/data/jhu/processed/charts/data/. /Users/guilherme/code/covid19/docs/data/
 
 }
 